@@ -1,25 +1,20 @@
 import os
+# Size TensorFlow/OpenCV/BLAS thread pools for this worker before any of them is imported
+from runtime_config import configure_runtime
+configure_runtime()
 import json
-import pickle
+import secrets
+import tempfile
+import threading
 import numpy as np
-import pandas as pd
-import plotly
-import plotly.express as px
 from flask import Flask, redirect, render_template, flash, request, jsonify, url_for, session
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin, login_required, logout_user, login_user, LoginManager, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from groq import Groq
-from werkzeug.utils import secure_filename
-from facial_stress_detection import initialize_facial_detector, get_facial_stress_analysis, combine_multimodal_predictions
 from physiological_stress import analyze_physiological_stress
 
-# Try to import joblib for better sklearn model loading
-try:
-    import joblib
-    USE_JOBLIB = True
-except ImportError:
-    USE_JOBLIB = False 
+from text_stress import load_text_scorer, stress_label_name
 
 # --- App Configuration ---
 app = Flask(__name__, 
@@ -30,6 +25,17 @@ app = Flask(__name__,
 # Upload configuration
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
+MAX_BATCH_IMAGES = 32  # per /api/facial_stress/batch request (MAX_CONTENT_LENGTH still applies)
+MAX_BATCH_TEXTS = 1000  # per /api/stress_text/batch request
+MAX_BATCH_TEXT_BYTES = 4 * 1024 * 1024  # UTF-8 bytes of all texts of one batch
+ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
+MAX_VIDEO_UPLOAD_SIZE = 1024 * 1024 * 1024  # 1GB, /api/video_stress only
+# facial_stress.html uploads camera captures under this name; a browser session's
+# captures share one motion gate, so faces that did not move skip emotion inference
+CAMERA_CAPTURE_FILENAME = 'camera_capture.jpg'
+# Videos are analyzed inside the request, so their length must fit gunicorn's
+# timeout (GUNICORN_TIMEOUT); longer recordings go through video_analysis.py
+MAX_VIDEO_SECONDS = float(os.getenv('MAX_VIDEO_SECONDS', '300'))  # 0 disables the cap
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
@@ -47,12 +53,45 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 # --- Groq Configuration ---
 client = Groq(api_key=GROQ_API_KEY)
 
-# --- Initialize Facial Stress Detector ---
-initialize_facial_detector()
+# --- Facial Stress Detector ---
+# FACIAL_LOAD_MODE decides when the facial stack (OpenCV, emotion model, TensorFlow) loads:
+#   eager      - import and warm up at worker boot (default)
+#   background - start loading at boot on a thread; facial requests wait for it
+#   lazy       - load on the first facial request, so text/physiological-only
+#                workers never pay for it
+FACIAL_LOAD_MODE = os.getenv('FACIAL_LOAD_MODE', 'eager')
+_facial_module = None
+_facial_lock = threading.Lock()
+
+def facial_stack():
+    """facial_stress_detection with its detector initialised and warm (loaded once, thread-safe)"""
+    global _facial_module
+    if _facial_module is None:
+        with _facial_lock:
+            if _facial_module is None:
+                import facial_stress_detection
+                facial_stress_detection.initialize_facial_detector(warm_up=True)
+                _facial_module = facial_stress_detection
+    return _facial_module
+
+def start_facial_stack():
+    """Begin loading the facial stack according to FACIAL_LOAD_MODE"""
+    if FACIAL_LOAD_MODE == 'eager':
+        facial_stack()
+    elif FACIAL_LOAD_MODE == 'background':
+        threading.Thread(target=facial_stack, name='facial-loader', daemon=True).start()
+
+# A preloading gunicorn master must not start TensorFlow or its threads before
+# forking; gunicorn.conf.py's post_fork starts the facial stack in every worker
+if os.getenv('GUNICORN_PRELOAD') != '1':
+    start_facial_stack()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def allowed_video(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_VIDEO_EXTENSIONS
+
 db = SQLAlchemy(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -63,29 +102,8 @@ login_manager.login_view = 'login'
 print("[OK] Physiological stress analyzer loaded (no pickle required)")
 model = None  # Not needed anymore, using direct calculation
 
-try:
-    if os.path.exists('stresslevel_text_model.pkl') and os.path.exists('stresslevel_text_vectorizer.pkl'):
-        if USE_JOBLIB:
-            try:
-                text_model = joblib.load('stresslevel_text_model.pkl')
-                text_vectorizer = joblib.load('stresslevel_text_vectorizer.pkl')
-                print("[OK] Text-based stress model loaded successfully (joblib)")
-            except:
-                text_model = pickle.load(open('stresslevel_text_model.pkl', 'rb'))
-                text_vectorizer = pickle.load(open('stresslevel_text_vectorizer.pkl', 'rb'))
-                print("[OK] Text-based stress model loaded successfully (pickle)")
-        else:
-            text_model = pickle.load(open('stresslevel_text_model.pkl', 'rb'))
-            text_vectorizer = pickle.load(open('stresslevel_text_vectorizer.pkl', 'rb'))
-            print("[OK] Text-based stress model loaded successfully (pickle)")
-    else:
-        print("[INFO] Text-based stress model files not found. Run 'python train_text_model.py' to create them.")
-        text_model = None
-        text_vectorizer = None
-except Exception as e:
-    print(f"[WARNING] Error loading text-based stress model: {e}")
-    text_model = None
-    text_vectorizer = None
+# Text model + vectorizer: one neighbor search per request (see text_stress.py)
+text_scorer = load_text_scorer()
 
 # --- Database Model ---
 class User(db.Model, UserMixin):
@@ -150,6 +168,10 @@ def exercises(): return render_template('exercises.html')
 @login_required
 def analysis():
     try:
+        # pandas and plotly are only needed here, so they load on the first visit
+        import pandas as pd
+        import plotly
+        import plotly.express as px
         train_df = pd.read_csv('dreaddit-train.csv', encoding='ISO-8859-1')
         fig = px.pie(train_df, names='subreddit', title='Subreddit Distribution')
         graphJSON = json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
@@ -231,21 +253,13 @@ def stress_text():
                 return render_template('stress_text.html', prediction_text3="Please enter some text to analyze.")
             
             # Make prediction if model exists
-            if text_model is None or text_vectorizer is None:
+            if text_scorer is None:
                 return render_template('stress_text.html', prediction_text3="Text-based stress detection model not available. Please use the numerical input method or contact administrator.")
             
-            # Vectorize the text
-            text_vectorized = text_vectorizer.transform([text])
-            
-            # Make prediction
-            prediction = text_model.predict(text_vectorized)[0]
-            
-            # Get prediction probability if available
-            try:
-                prediction_proba = text_model.predict_proba(text_vectorized)[0]
-                stress_prob = prediction_proba[1] if len(prediction_proba) > 1 else 0.5
-            except:
-                stress_prob = 0.5
+            # Label and stress probability from one vectorization and neighbor search
+            scored = text_scorer.score_text(text)
+            prediction = scored['prediction']
+            stress_prob = scored['stress_probability']
             
             # Format result
             if prediction == 0 or prediction == '0':
@@ -292,14 +306,13 @@ def facial_stress_page():
             if not allowed_file(file.filename):
                 return render_template('facial_stress.html', prediction_text3="Only image files (PNG, JPG, JPEG, GIF, BMP) are allowed.")
             
-            # Save uploaded file
-            filename = secure_filename(file.filename)
-            timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S_')
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], timestamp + filename)
-            file.save(filepath)
+            capture_session = None
+            if file.filename == CAMERA_CAPTURE_FILENAME:
+                capture_session = session.setdefault('capture_session', secrets.token_hex(16))
             
-            # Analyze facial stress
-            facial_result = get_facial_stress_analysis(filepath)
+            # Analyze facial stress straight from the upload stream (no temp file)
+            facial_result = facial_stack().get_facial_stress_analysis_from_bytes(
+                file.read(), capture_session=capture_session)
             
             # Format result with better display
             if facial_result.get('error'):
@@ -345,12 +358,6 @@ def facial_stress_page():
                             for i, rec in enumerate(recommendations[:4], 1):
                                 result += f"{i}. {rec}\n"
             
-            # Clean up uploaded file
-            try:
-                os.remove(filepath)
-            except:
-                pass
-            
             return render_template('facial_stress.html', prediction_text3=result)
             
         except Exception as e:
@@ -404,15 +411,9 @@ def multimodal_stress():
         
         # Process text data
         if text:
-            if text_model and text_vectorizer:
+            if text_scorer is not None:
                 try:
-                    text_vec = text_vectorizer.transform([text])
-                    pred = text_model.predict(text_vec)[0]
-                    try:
-                        prob = text_model.predict_proba(text_vec)[0]
-                        text_stress_score = prob[1] if len(prob) > 1 else 0.5
-                    except:
-                        text_stress_score = 0.5 if pred == 1 else 0.2
+                    text_stress_score = text_scorer.score_text(text)['stress_probability']
                 except Exception as e:
                     print(f"Error processing text data: {e}")
         
@@ -421,24 +422,15 @@ def multimodal_stress():
         if facial_file and facial_file.filename != '':
             if allowed_file(facial_file.filename):
                 try:
-                    filename = secure_filename(facial_file.filename)
-                    timestamp = pd.Timestamp.now().strftime('%Y%m%d_%H%M%S_')
-                    filepath = os.path.join(app.config['UPLOAD_FOLDER'], timestamp + filename)
-                    facial_file.save(filepath)
-                    
-                    facial_result = get_facial_stress_analysis(filepath)
+                    facial_result = facial_stack().get_facial_stress_analysis_from_bytes(facial_file.read())
                     if not facial_result.get('error'):
                         facial_stress_score = facial_result.get('average_stress_score', 0.5)
-                    
-                    # Clean up
-                    try:
-                        os.remove(filepath)
-                    except:
-                        pass
                 except Exception as e:
                     print(f"Error processing facial data: {e}")
         
         # Combine results using proper scores
+        # Pure score arithmetic: importing the module does not load the emotion model
+        from facial_stress_detection import combine_multimodal_predictions
         multimodal = combine_multimodal_predictions(
             facial_stress_score if facial_stress_score is not None else 0.5,
             physiological_stress_score if physiological_stress_score is not None else 0.5,
@@ -468,6 +460,152 @@ def multimodal_stress():
         print(f"Error in multimodal stress detection: {e}")
         return render_template('stress.html', prediction_text3=f"Error in multimodal analysis: {str(e)}")
 
+@app.route('/api/stress_text/batch', methods=['POST'])
+@login_required
+def stress_text_batch():
+    """
+    Score many texts in one request: JSON body {"texts": ["...", ...]}
+    All valid texts share one vectorization and one model pass
+    Returns JSON with one result per text, in request order
+    """
+    payload = request.get_json(silent=True)
+    texts = payload.get('texts') if isinstance(payload, dict) else None
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'success': False, 'error': "Send a JSON body with a non-empty 'texts' list."}), 400
+    if len(texts) > MAX_BATCH_TEXTS:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH_TEXTS} texts per request.'}), 413
+    if text_scorer is None:
+        return jsonify({'success': False, 'error': 'Text-based stress detection model not available.'}), 503
+    
+    results = [None] * len(texts)
+    positions, valid_texts, total_bytes = [], [], 0
+    for i, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            results[i] = {'success': False, 'error': 'Each item must be a non-empty string.'}
+            continue
+        total_bytes += len(text.encode('utf-8'))
+        positions.append(i)
+        valid_texts.append(text)
+    if total_bytes > MAX_BATCH_TEXT_BYTES:
+        return jsonify({'success': False, 'error': f'Texts exceed {MAX_BATCH_TEXT_BYTES} bytes in total.'}), 413
+    
+    try:
+        for i, scored in zip(positions, text_scorer.score_texts(valid_texts)):
+            scored['success'] = True
+            scored['label'] = stress_label_name(scored['prediction'])
+            results[i] = scored
+    except Exception as e:
+        print(f"Error in batch text stress prediction: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    for i, result in enumerate(results):
+        result['index'] = i
+    return jsonify({
+        'success': True,
+        'texts': len(results),
+        'scored': len(positions),
+        'results': results
+    })
+
+@app.route('/api/facial_stress/batch', methods=['POST'])
+@login_required
+def facial_stress_batch():
+    """
+    Analyze several images in one request (multipart field 'images')
+    Returns JSON with one result per image, in upload order
+    """
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({'success': False, 'error': "Upload one or more images in the 'images' field."}), 400
+    if len(files) > MAX_BATCH_IMAGES:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH_IMAGES} images per request.'}), 400
+    
+    results = [None] * len(files)
+    positions, images_bytes = [], []
+    for i, file in enumerate(files):
+        if allowed_file(file.filename):
+            positions.append(i)
+            images_bytes.append(file.read())
+        else:
+            results[i] = {'success': False, 'error': 'Only image files (PNG, JPG, JPEG, GIF, BMP) are allowed.'}
+    
+    try:
+        # All faces of all images share one batched emotion inference
+        for i, result in zip(positions, facial_stack().analyze_images_from_bytes(images_bytes)):
+            results[i] = result
+    except Exception as e:
+        print(f"Error in batch facial stress detection: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    for file, result in zip(files, results):
+        result['filename'] = file.filename
+    return jsonify({
+        'success': True,
+        'images': len(results),
+        'analyzed': sum(1 for result in results if result.get('success')),
+        'results': results
+    })
+
+@app.route('/api/video_stress', methods=['POST'])
+@login_required
+def video_stress():
+    """
+    Analyze a recorded video (multipart field 'video'); optional form fields
+    samples_per_second or every_n_frames control frame sampling
+    Returns JSON with a per-second stress timeline and a summary
+    """
+    # Videos may exceed the global upload limit; set before the form is parsed
+    request.max_content_length = MAX_VIDEO_UPLOAD_SIZE
+    file = request.files.get('video')
+    if file is None or file.filename == '':
+        return jsonify({'success': False, 'error': "Upload a video in the 'video' field."}), 400
+    if not allowed_video(file.filename):
+        return jsonify({'success': False, 'error': 'Only video files (MP4, AVI, MOV, MKV, WEBM) are allowed.'}), 400
+    
+    try:
+        options = {}
+        if request.form.get('every_n_frames'):
+            options['every_n_frames'] = int(request.form['every_n_frames'])
+        elif request.form.get('samples_per_second'):
+            options['samples_per_second'] = float(request.form['samples_per_second'])
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Frame sampling options must be numbers.'}), 400
+    
+    # OpenCV decodes from a path, so the upload is streamed to a temporary file
+    suffix = '.' + file.filename.rsplit('.', 1)[1].lower()
+    fd, video_path = tempfile.mkstemp(suffix=suffix, dir=app.config['UPLOAD_FOLDER'])
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            file.save(f)
+        result = facial_stack().get_video_stress_analysis(video_path, max_seconds=MAX_VIDEO_SECONDS, **options)
+    except Exception as e:
+        print(f"Error in video stress detection: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        os.remove(video_path)
+    if result.get('too_long'):
+        return jsonify(result), 413
+    return jsonify(result), (200 if result.get('success') else 422)
+
+@app.route('/health/facial')
+def facial_health():
+    """Readiness of the facial stress detector (emotion model warm-up)"""
+    if _facial_module is None:
+        # Not loaded yet (lazy/background mode); checking must not trigger the load
+        status = {'ready': False, 'loaded': False}
+    else:
+        status = _facial_module.get_facial_detector_status()
+        status['loaded'] = True
+    status['load_mode'] = FACIAL_LOAD_MODE
+    return jsonify(status), (200 if status['ready'] else 503)
+
+@app.route('/health/text')
+def text_health():
+    """Text stress model scoring path and prediction cache hit rate"""
+    if text_scorer is None:
+        return jsonify({'ready': False}), 503
+    return jsonify({'ready': True, 'model': text_scorer.describe(), 'cache': text_scorer.cache_stats()})
+
 # --- CHAT ROUTE (Fixed 302 and AI logic) ---
 @app.route('/chat', methods=['POST'])
 def chat():
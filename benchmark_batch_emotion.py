@@ -0,0 +1,71 @@
+"""
+Benchmark: per-face DeepFace.analyze vs batched emotion inference
+Reports per-image latency against the number of faces in the image
+
+Usage: python benchmark_batch_emotion.py [image_path] [repeats]
+"""
+
+import sys
+import time
+import cv2
+import numpy as np
+from facial_stress_detection import FacialStressDetector
+
+FACE_COUNTS = [1, 2, 5, 10, 20]
+FACE_SIZE = 96
+
+
+def build_test_frame(image_path=None):
+    """Load a real image or create a synthetic grey frame"""
+    if image_path:
+        img = cv2.imread(image_path)
+        if img is None:
+            raise ValueError(f"Could not read image: {image_path}")
+        return cv2.resize(img, (FACE_SIZE * 5, FACE_SIZE * 4))
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(FACE_SIZE * 4, FACE_SIZE * 5, 3), dtype=np.uint8)
+
+
+def grid_faces(count):
+    """Lay out `count` face boxes on a 5-column grid"""
+    return [((i % 5) * FACE_SIZE, (i // 5) * FACE_SIZE, FACE_SIZE, FACE_SIZE) for i in range(count)]
+
+
+def time_call(fn, repeats):
+    """Return the median latency of fn() in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    image_path = sys.argv[1] if len(sys.argv) > 1 else None
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    detector = FacialStressDetector()
+    frame = build_test_frame(image_path)
+
+    # Warm both paths so model construction is not timed
+    detector.analyze_emotion_deepface(frame, grid_faces(1)[0])
+    detector.analyze_emotions_batch(frame, grid_faces(1))
+
+    print("\n" + "=" * 60)
+    print(f"{'Faces':>6} {'Per-face (ms)':>15} {'Batched (ms)':>14} {'Speedup':>9}")
+    print("-" * 60)
+
+    for count in FACE_COUNTS:
+        faces = grid_faces(count)
+        per_face = time_call(
+            lambda: [detector.analyze_emotion_deepface(frame, face) for face in faces], repeats
+        )
+        batched = time_call(lambda: detector.analyze_emotions_batch(frame, faces), repeats)
+        print(f"{count:>6} {per_face:>15.1f} {batched:>14.1f} {per_face / batched:>8.1f}x")
+
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
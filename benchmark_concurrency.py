@@ -0,0 +1,94 @@
+"""
+Benchmark: facial analysis latency under concurrency, with and without the
+runtime thread governor (runtime_config.py)
+Starts `workers` processes that each behave like a gunicorn worker and analyze
+the same image back to back, then reports p50/p95/p99 latency and throughput
+
+Usage: python benchmark_concurrency.py [image_path] [workers] [requests_per_worker]
+"""
+
+import os
+import sys
+import time
+import multiprocessing
+
+# numpy, cv2 and the detector are imported inside functions only: spawned workers
+# re-import this module, and BLAS must not start before configure_runtime() runs
+
+
+def _worker(governed, workers, image_path, requests, ready, start, results):
+    """One simulated gunicorn worker"""
+    if governed:
+        from runtime_config import configure_runtime
+        configure_runtime(workers=workers)
+    import numpy as np
+    import cv2
+    from facial_stress_detection import FacialStressDetector
+
+    detector = FacialStressDetector(warm_up=True, cache_size=0, motion_threshold=None)
+    img = cv2.imread(image_path) if image_path else None
+    if img is None:
+        img = np.random.default_rng(0).integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+
+    ready.wait()
+    start.wait()
+    latencies = []
+    for _ in range(requests):
+        begin = time.perf_counter()
+        detector.get_facial_stress_analysis_from_array(img)
+        latencies.append((time.perf_counter() - begin) * 1000)
+    results.put(latencies)
+
+
+def run(governed, workers, image_path, requests):
+    """Returns: (all request latencies in ms, wall-clock seconds)"""
+    import numpy as np
+    # spawn, so every worker imports the libraries fresh like a gunicorn worker
+    context = multiprocessing.get_context('spawn')
+    ready = context.Barrier(workers + 1)
+    start = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(governed, workers, image_path, requests, ready, start, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    ready.wait()
+    began = time.perf_counter()
+    start.wait()
+    latencies = []
+    for _ in processes:
+        latencies.extend(results.get())
+    wall = time.perf_counter() - began
+    for process in processes:
+        process.join()
+    return np.array(latencies), wall
+
+
+def main():
+    import numpy as np
+    image_path = sys.argv[1] if len(sys.argv) > 1 else None
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    requests = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+    if image_path is None and os.path.isdir('uploads'):
+        images = sorted(f for f in os.listdir('uploads') if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+        image_path = os.path.join('uploads', images[0]) if images else None
+
+    rows = []
+    for label, governed in (('default threads', False), ('governed', True)):
+        latencies, wall = run(governed, workers, image_path, requests)
+        rows.append((label, np.percentile(latencies, 50), np.percentile(latencies, 95),
+                     np.percentile(latencies, 99), len(latencies) / wall))
+
+    print("\n" + "=" * 72)
+    print(f"{'Mode':>16} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'Req/s':>9}")
+    print("-" * 72)
+    for label, p50, p95, p99, throughput in rows:
+        print(f"{label:>16} {p50:>10.1f} {p95:>10.1f} {p99:>10.1f} {throughput:>9.1f}")
+    print("=" * 72)
+    print(f"[INFO] {workers} worker(s) x {requests} request(s) on {os.cpu_count()} core(s), "
+          f"image: {image_path or 'synthetic 640x480'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: cost of DeepFace re-detecting faces that were already cropped
+Times one emotion analysis per detected face with DeepFace's default detector
+('opencv', the previous behaviour), with detection skipped ('skip'), with the
+eye alignment step added, and through the batched emotion path
+
+Usage: python benchmark_deepface_detection.py [image_dir] [repeats]
+"""
+
+import sys
+import time
+import cv2
+import numpy as np
+from face_detectors import EyeLocator, aligned_face_crop
+from facial_stress_detection import FacialStressDetector, EMOTION_INPUT_SIZE, _deepface
+from benchmark_face_detection import load_images
+from benchmark_batch_emotion import build_test_frame, grid_faces
+
+
+def time_per_face(fn, faces, repeats):
+    """Median milliseconds of fn(face) over all faces and repeats"""
+    timings = []
+    for _ in range(repeats):
+        for face in faces:
+            start = time.perf_counter()
+            fn(face)
+            timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def collect_faces(detector, image_dir):
+    """(frame, gray, face box) for every face found in image_dir, or a synthetic grid"""
+    samples = []
+    for _, img in load_images(image_dir):
+        faces, gray = detector.detect_faces(img)
+        samples.extend((img, gray, tuple(int(v) for v in face)) for face in faces)
+    if not samples:
+        frame = build_test_frame()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        samples = [(frame, gray, face) for face in grid_faces(5)]
+    return samples
+
+
+def main():
+    image_dir = sys.argv[1] if len(sys.argv) > 1 else 'uploads'
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    detector = FacialStressDetector(cache_size=0, motion_threshold=None)
+    aligned_detector = FacialStressDetector(cache_size=0, motion_threshold=None, align_faces=True)
+    samples = collect_faces(detector, image_dir)
+    eye_locator = EyeLocator()
+
+    def deepface_on_roi(sample, backend):
+        frame, _, (x, y, w, h) = sample
+        face_rgb = cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2RGB)
+        return _deepface().analyze(face_rgb, actions=['emotion'], detector_backend=backend,
+                                   enforce_detection=False, silent=True)
+
+    def align(sample):
+        frame, gray, face = sample
+        eyes = eye_locator.locate(gray, face)
+        return aligned_face_crop(frame, face, eyes, (face[2], face[3])) if eyes else None
+
+    # Warm every path so model construction is not timed
+    deepface_on_roi(samples[0], 'opencv')
+    detector.analyze_emotions_batch(samples[0][0], [samples[0][2]])
+
+    rows = [
+        ("DeepFace, detector 'opencv'", time_per_face(lambda s: deepface_on_roi(s, 'opencv'), samples, repeats)),
+        ("DeepFace, detector 'skip'", time_per_face(lambda s: deepface_on_roi(s, 'skip'), samples, repeats)),
+        ("Eye alignment only", time_per_face(align, samples, repeats)),
+        ("DeepFace 'skip' + alignment",
+         time_per_face(lambda s: aligned_detector.analyze_emotion_deepface(s[0], s[2]), samples, repeats)),
+        ("Batched emotion path", time_per_face(lambda s: detector.analyze_emotions_batch(s[0], [s[2]]),
+                                               samples, repeats)),
+    ]
+    aligned = sum(eye_locator.locate(gray, face) is not None for _, gray, face in samples)
+
+    print("\n" + "=" * 60)
+    print(f"{'Per face':<36} {'Median (ms)':>12}")
+    print("-" * 60)
+    for label, ms in rows:
+        print(f"{label:<36} {ms:>12.2f}")
+    print("-" * 60)
+    print(f"{'Re-detection removed per face':<36} {rows[0][1] - rows[1][1]:>12.2f}")
+    print("=" * 60)
+    print(f"[INFO] {len(samples)} face(s) from {image_dir}, eyes found on {aligned}, "
+          f"emotion input {EMOTION_INPUT_SIZE[0]}x{EMOTION_INPUT_SIZE[1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: full-resolution vs downscaled Haar face detection
+Reports detection time and recall (against full-resolution detection) for
+each image resized to several sizes
+
+Usage: python benchmark_face_detection.py [image_dir] [max_side ...]
+"""
+
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from facial_stress_detection import FacialStressDetector, DEFAULT_DETECTION_MAX_SIDE
+
+IMAGE_SIZES = [640, 1280, 1920, 3024, 4032]   # longest side, up to 12 MP phone photos
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def load_images(image_dir):
+    """Load all readable images from a directory"""
+    images = []
+    for name in sorted(os.listdir(image_dir)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            img = cv2.imread(os.path.join(image_dir, name))
+            if img is not None:
+                images.append((name, img))
+    return images
+
+
+def resize_longest_side(img, size):
+    """Resize so the longest side equals `size` pixels"""
+    height, width = img.shape[:2]
+    scale = size / float(max(height, width))
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(img, (int(round(width * scale)), int(round(height * scale))), interpolation=interpolation)
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def recall(reference, candidate, threshold=0.5):
+    """Fraction of reference boxes matched by a candidate box with IoU >= threshold"""
+    if len(reference) == 0:
+        return 1.0
+    matched = sum(1 for ref in reference if any(box_iou(ref, box) >= threshold for box in candidate))
+    return matched / len(reference)
+
+
+def timed_detect(detector, img):
+    start = time.perf_counter()
+    faces, _ = detector.detect_faces(img)
+    return faces, (time.perf_counter() - start) * 1000
+
+
+def main():
+    image_dir = sys.argv[1] if len(sys.argv) > 1 else 'uploads'
+    max_sides = [int(v) for v in sys.argv[2:]] or [DEFAULT_DETECTION_MAX_SIDE, 960]
+
+    images = load_images(image_dir)
+    if not images:
+        print(f"[ERROR] No images found in {image_dir}")
+        sys.exit(1)
+
+    full_res = FacialStressDetector(detection_max_side=None)
+    downscaled = {side: FacialStressDetector(detection_max_side=side) for side in max_sides}
+
+    print("\n" + "=" * 78)
+    header = f"{'Size':>6} {'Full (ms)':>10} {'Faces':>6}"
+    for side in max_sides:
+        header += f" {f'@{side} (ms)':>12} {'Recall':>7}"
+    print(header)
+    print("-" * 78)
+
+    for size in IMAGE_SIZES:
+        full_ms, full_faces = [], 0
+        side_ms = {side: [] for side in max_sides}
+        side_recall = {side: [] for side in max_sides}
+
+        for _, img in images:
+            resized = resize_longest_side(img, size)
+            reference, ms = timed_detect(full_res, resized)
+            full_ms.append(ms)
+            full_faces += len(reference)
+            for side, detector in downscaled.items():
+                faces, ms = timed_detect(detector, resized)
+                side_ms[side].append(ms)
+                side_recall[side].append(recall(reference, faces))
+
+        row = f"{size:>6} {np.mean(full_ms):>10.1f} {full_faces:>6}"
+        for side in max_sides:
+            row += f" {np.mean(side_ms[side]):>12.1f} {np.mean(side_recall[side]):>7.2f}"
+        print(row)
+
+    print("=" * 78)
+    print(f"[INFO] {len(images)} image(s) from {image_dir}; recall is measured against full-resolution detection")
+
+
+if __name__ == '__main__':
+    main()
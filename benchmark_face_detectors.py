@@ -0,0 +1,57 @@
+"""
+Benchmark: face detector backends (Haar, OpenCV DNN, YuNet)
+Reports milliseconds per frame and detection counts for every backend whose
+model files are available, on a local image set
+
+Usage: python benchmark_face_detectors.py [image_dir] [detection_max_side]
+"""
+
+import sys
+import time
+import numpy as np
+from facial_stress_detection import FacialStressDetector, DEFAULT_DETECTION_MAX_SIDE
+from face_detectors import FACE_DETECTOR_BACKENDS, create_face_detector
+from benchmark_face_detection import load_images
+
+
+def main():
+    image_dir = sys.argv[1] if len(sys.argv) > 1 else 'uploads'
+    max_side = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DETECTION_MAX_SIDE
+
+    images = load_images(image_dir)
+    if not images:
+        print(f"[ERROR] No images found in {image_dir}")
+        sys.exit(1)
+
+    print("\n" + "=" * 72)
+    print(f"{'Backend':>8} {'Mean (ms)':>10} {'p95 (ms)':>10} {'Faces':>7} {'Images w/ face':>16}")
+    print("-" * 72)
+
+    for backend in FACE_DETECTOR_BACKENDS:
+        try:
+            create_face_detector(backend)
+        except Exception as e:
+            print(f"{backend:>8}  skipped: {e}")
+            continue
+
+        detector = FacialStressDetector(detection_max_side=max_side, detector_backend=backend)
+        # One untimed pass so lazy backend initialisation is not measured
+        detector.detect_faces(images[0][1])
+
+        timings, total_faces, images_with_face = [], 0, 0
+        for _, img in images:
+            start = time.perf_counter()
+            faces, _ = detector.detect_faces(img)
+            timings.append((time.perf_counter() - start) * 1000)
+            total_faces += len(faces)
+            images_with_face += int(len(faces) > 0)
+
+        print(f"{backend:>8} {np.mean(timings):>10.1f} {np.percentile(timings, 95):>10.1f} "
+              f"{total_faces:>7} {images_with_face:>9}/{len(images)}")
+
+    print("=" * 72)
+    print(f"[INFO] {len(images)} image(s) from {image_dir}, detection at max side {max_side}px")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: text scoring throughput, one text per call vs batches
+Scores dreaddit texts through TextStressScorer (cache off) and through the
+/api/stress_text/batch endpoint with Flask's test client, and reports items/s
+
+Usage: python benchmark_text_batch.py [items] [csv_path]
+"""
+
+import os
+import sys
+import time
+import pandas as pd
+from text_stress import load_text_scorer
+
+BATCH_SIZES = [1, 10, 100, 1000]
+
+
+def items_per_second(fn, texts, batch_size):
+    """Throughput of fn(batch) over texts split into batches of batch_size"""
+    start = time.perf_counter()
+    for begin in range(0, len(texts), batch_size):
+        fn(texts[begin:begin + batch_size])
+    return len(texts) / (time.perf_counter() - start)
+
+
+def http_client():
+    """Test client for app.py with login disabled; None when the app cannot be imported"""
+    # Text scoring only: the facial stack is not needed
+    os.environ.setdefault('FACIAL_LOAD_MODE', 'lazy')
+    try:
+        import app as flask_app
+    except Exception as e:
+        print(f"[WARNING] app.py could not be imported, skipping HTTP rows: {e}")
+        return None
+    flask_app.app.config['LOGIN_DISABLED'] = True
+    # Cache off so repeated runs measure scoring, not lookups
+    flask_app.text_scorer = load_text_scorer(cache_size=0)
+    return flask_app.app.test_client()
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else 'dreaddit-train.csv'
+
+    scorer = load_text_scorer(cache_size=0)
+    if scorer is None:
+        sys.exit(1)
+    texts = pd.read_csv(csv_path, encoding='ISO-8859-1')['text'].fillna('').tolist()
+    texts = [texts[i % len(texts)] for i in range(items)]
+    scorer.score_texts(texts[:10])
+
+    rows = [(f'score_texts, batch {size}', items_per_second(scorer.score_texts, texts, size))
+            for size in BATCH_SIZES]
+
+    client = http_client()
+    if client is not None:
+        def post(batch):
+            response = client.post('/api/stress_text/batch', json={'texts': batch})
+            assert response.status_code == 200, response.get_data(as_text=True)
+        post(texts[:10])
+        rows += [(f'HTTP batch {size}', items_per_second(post, texts, size)) for size in BATCH_SIZES]
+
+    print("\n" + "=" * 50)
+    print(f"{'Path':<30} {'Items/s':>12}")
+    print("-" * 50)
+    for label, throughput in rows:
+        print(f"{label:<30} {throughput:>12.0f}")
+    print("=" * 50)
+    print(f"[INFO] {items} text(s) from {csv_path}, {scorer.describe()['scoring']}")
+
+
+if __name__ == '__main__':
+    main()
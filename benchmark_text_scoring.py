@@ -0,0 +1,69 @@
+"""
+Benchmark: text stress scoring per request
+Compares the previous route code (transform, predict, then predict_proba: two
+neighbor searches) with TextStressScorer (one transform, one sparse mat-vec)
+on texts from the dreaddit dataset, and checks both give the same answers
+
+Usage: python benchmark_text_scoring.py [requests] [csv_path]
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+from text_stress import load_text_scorer
+
+
+def latency_stats(fn, texts):
+    """Per-call latencies of fn(text) in milliseconds"""
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    csv_path = sys.argv[2] if len(sys.argv) > 2 else 'dreaddit-train.csv'
+
+    # Cache off: every request pays for the neighbor search
+    scorer = load_text_scorer(cache_size=0)
+    if scorer is None:
+        sys.exit(1)
+    texts = pd.read_csv(csv_path, encoding='ISO-8859-1')['text'].fillna('').tolist()
+    texts = [texts[i % len(texts)] for i in range(requests)]
+    model, vectorizer = scorer.model, scorer.vectorizer
+
+    def previous_path(text):
+        features = vectorizer.transform([text])
+        prediction = model.predict(features)[0]
+        return prediction, model.predict_proba(features)[0][1]
+
+    # One untimed call each so lazy initialisation is not measured
+    previous_path(texts[0])
+    scorer.score_text(texts[0])
+
+    rows = [('predict + predict_proba', latency_stats(previous_path, texts)),
+            ('TextStressScorer', latency_stats(scorer.score_text, texts))]
+
+    mismatches = 0
+    for text in texts:
+        prediction, probability = previous_path(text)
+        scored = scorer.score_text(text)
+        mismatches += int(scored['prediction'] != prediction or abs(scored['stress_probability'] - probability) > 1e-9)
+
+    print("\n" + "=" * 66)
+    print(f"{'Path':<26} {'p50 (ms)':>10} {'p95 (ms)':>10} {'Mean (ms)':>10}")
+    print("-" * 66)
+    for label, timings in rows:
+        print(f"{label:<26} {np.percentile(timings, 50):>10.2f} {np.percentile(timings, 95):>10.2f} "
+              f"{timings.mean():>10.2f}")
+    print("=" * 66)
+    print(f"[INFO] {requests} request(s), {scorer.describe()}, speedup "
+          f"{rows[0][1].mean() / rows[1][1].mean():.1f}x, mismatches: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
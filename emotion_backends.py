@@ -0,0 +1,115 @@
+"""
+Exported Emotion Model Backends
+Runs emotion models exported by export_emotion_model.py (ONNX or TFLite) without
+importing TensorFlow. Each backend is called like a Keras model,
+model(batch, training=False), on an (N, 48, 48, 1) float32 tensor and returns
+(N, num_emotions) probabilities.
+"""
+
+import json
+import os
+import pickle
+import threading
+import numpy as np
+from runtime_config import configured_threads
+
+# Labels written by train_emotion_model.py next to emotion_model.keras
+KERAS_LABELS_FILE = 'emotion_labels.pkl'
+
+
+def labels_path_for(model_path):
+    """Sidecar JSON holding the model's emotion labels in output order"""
+    return os.path.splitext(model_path)[0] + '.labels.json'
+
+
+def save_labels(model_path, labels):
+    with open(labels_path_for(model_path), 'w') as f:
+        json.dump([label.lower() for label in labels], f)
+
+
+def load_labels(model_path):
+    with open(labels_path_for(model_path)) as f:
+        return json.load(f)
+
+
+class OnnxEmotionModel:
+    """Emotion model served by onnxruntime (CPU)"""
+
+    def __init__(self, model_path, num_threads=None):
+        import onnxruntime as ort
+
+        num_threads = num_threads or configured_threads()
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch, training=False):
+        return self.session.run(None, {self.input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+
+class TFLiteEmotionModel:
+    """Emotion model served by the TFLite interpreter (tflite_runtime, no TensorFlow import)"""
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            # Full TensorFlow also ships the interpreter, at the cost of importing it
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads or configured_threads())
+        self.interpreter.allocate_tensors()
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = None
+        # The interpreter holds per-call state, so calls are serialised
+        self._lock = threading.Lock()
+
+    def __call__(self, batch, training=False):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self._batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self.input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
+
+
+EMOTION_MODEL_BACKENDS = {
+    '.onnx': OnnxEmotionModel,
+    '.tflite': TFLiteEmotionModel,
+}
+
+
+def load_exported_emotion_model(model_path, num_threads=None):
+    """
+    Load an exported emotion model, picking the backend from the file extension
+    Returns: (model, labels)
+    """
+    extension = os.path.splitext(model_path)[1].lower()
+    if extension not in EMOTION_MODEL_BACKENDS:
+        raise ValueError(f"Unsupported emotion model format '{extension}' (expected .onnx or .tflite)")
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Exported emotion model not found: {model_path}")
+    model = EMOTION_MODEL_BACKENDS[extension](model_path, num_threads=num_threads)
+    return model, load_labels(model_path)
+
+
+def load_emotion_model_file(model_path, num_threads=None):
+    """
+    Load a Keras (.keras/.h5, labels from emotion_labels.pkl beside it) or an
+    exported emotion model; only the Keras formats import TensorFlow
+    Returns: (model, labels)
+    """
+    if os.path.splitext(model_path)[1].lower() not in ('.keras', '.h5'):
+        return load_exported_emotion_model(model_path, num_threads=num_threads)
+
+    import tensorflow as tf
+    model = tf.keras.models.load_model(model_path)
+    with open(os.path.join(os.path.dirname(model_path), KERAS_LABELS_FILE), 'rb') as f:
+        labels = pickle.load(f)
+    return model, [label.lower() for label in labels]
@@ -0,0 +1,169 @@
+"""
+Export the emotion model for TensorFlow-free CPU serving
+Converts DeepFace's emotion network or emotion_model.keras (train_emotion_model.py)
+to TFLite or ONNX, optionally quantized, writes the labels sidecar and reports
+accuracy parity and latency against the original Keras model
+
+Usage: python export_emotion_model.py [deepface|keras] [tflite|onnx] [none|dynamic|int8] [image_dir]
+  dynamic: int8 weights, float activations
+  int8:    int8 weights and activations, calibrated on face crops from image_dir
+           (float input/output, so the serving code is unchanged)
+
+Serve the result with FACIAL_EMOTION_MODEL=<exported file>, or
+FacialStressDetector(emotion_model_path=...)
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from emotion_backends import load_emotion_model_file, load_exported_emotion_model, save_labels
+from facial_stress_detection import (FacialStressDetector, DEEPFACE_EMOTION_LABELS, EMOTION_INPUT_SIZE,
+                                     build_deepface_emotion_model)
+from benchmark_face_detection import load_images
+
+OUTPUT_DIR = 'models'
+KERAS_MODEL_PATH = 'emotion_model.keras'
+CALIBRATION_SAMPLES = 200
+LATENCY_REPEATS = 50
+
+
+def load_source_model(source):
+    """Returns: (keras model, labels in output order)"""
+    if source == 'deepface':
+        return build_deepface_emotion_model(), DEEPFACE_EMOTION_LABELS
+
+    return load_emotion_model_file(KERAS_MODEL_PATH)
+
+
+def load_face_samples(image_dir):
+    """
+    (N, 48, 48, 1) face crops from image_dir, preprocessed exactly like serving;
+    random images when no faces are found (parity then only covers synthetic input)
+    """
+    samples = []
+    images = load_images(image_dir) if image_dir and os.path.isdir(image_dir) else []
+    if images:
+        detector = FacialStressDetector(cache_size=0, motion_threshold=None, inference_workers=0)
+        for _, img in images:
+            faces, gray = detector.detect_faces(img)
+            if len(faces):
+                samples.append(detector._prepare_emotion_batch(img, faces, gray=gray))
+
+    if samples:
+        print(f"[OK] {sum(len(s) for s in samples)} face crop(s) from {len(images)} image(s) in {image_dir}")
+        return np.concatenate(samples)
+
+    print("[WARNING] No face images found, using random 48x48 inputs for calibration and parity")
+    rng = np.random.default_rng(0)
+    return rng.random((CALIBRATION_SAMPLES, EMOTION_INPUT_SIZE[1], EMOTION_INPUT_SIZE[0], 1), dtype=np.float32)
+
+
+def export_tflite(model, output_path, quantize, samples):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize in ('dynamic', 'int8'):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == 'int8':
+        converter.representative_dataset = lambda: ([sample[None]] for sample in samples[:CALIBRATION_SAMPLES])
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+
+
+def export_onnx(model, output_path, quantize, samples):
+    import tensorflow as tf
+    import tf2onnx
+
+    float_path = output_path if quantize == 'none' else output_path + '.float.onnx'
+    input_signature = (tf.TensorSpec((None, EMOTION_INPUT_SIZE[1], EMOTION_INPUT_SIZE[0], 1), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=input_signature, opset=13, output_path=float_path)
+    if quantize == 'none':
+        return
+
+    from onnxruntime.quantization import CalibrationDataReader, QuantType, quantize_dynamic, quantize_static
+
+    if quantize == 'dynamic':
+        quantize_dynamic(float_path, output_path, weight_type=QuantType.QInt8)
+    else:
+        class FaceCalibrationReader(CalibrationDataReader):
+            def __init__(self):
+                self._samples = iter(samples[:CALIBRATION_SAMPLES])
+
+            def get_next(self):
+                sample = next(self._samples, None)
+                return None if sample is None else {'input': sample[None]}
+
+        quantize_static(float_path, output_path, FaceCalibrationReader(),
+                        activation_type=QuantType.QInt8, weight_type=QuantType.QInt8)
+    os.remove(float_path)
+
+
+def median_latency_ms(fn, batch):
+    fn(batch)
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def parity_report(model, exported_path, samples):
+    """Top-1 agreement, probability error and latency of the exported model vs the original"""
+    exported, _ = load_exported_emotion_model(exported_path)
+    original = lambda batch: np.asarray(model(batch, training=False))
+
+    reference = original(samples)
+    candidate = np.asarray(exported(samples))
+    abs_diff = np.abs(reference - candidate)
+
+    print("\n" + "=" * 60)
+    print(f"Parity on {len(samples)} sample(s)")
+    print(f"  top-1 agreement:   {np.mean(reference.argmax(axis=1) == candidate.argmax(axis=1)) * 100:.1f}%")
+    print(f"  max |prob diff|:   {abs_diff.max():.4f}")
+    print(f"  mean |prob diff|:  {abs_diff.mean():.4f}")
+    print("-" * 60)
+    print(f"{'Batch':>6} {'Keras (ms)':>12} {'Exported (ms)':>14} {'Speedup':>9}")
+    for batch_size in (1, 16):
+        batch = np.resize(samples, (batch_size,) + samples.shape[1:])
+        keras_ms = median_latency_ms(original, batch)
+        exported_ms = median_latency_ms(exported, batch)
+        print(f"{batch_size:>6} {keras_ms:>12.2f} {exported_ms:>14.2f} {keras_ms / exported_ms:>8.1f}x")
+    print("=" * 60)
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else 'deepface'
+    export_format = sys.argv[2] if len(sys.argv) > 2 else 'tflite'
+    quantize = sys.argv[3] if len(sys.argv) > 3 else 'none'
+    image_dir = sys.argv[4] if len(sys.argv) > 4 else 'uploads'
+
+    if source not in ('deepface', 'keras') or export_format not in ('tflite', 'onnx') \
+            or quantize not in ('none', 'dynamic', 'int8'):
+        print(__doc__)
+        sys.exit(1)
+
+    model, labels = load_source_model(source)
+    samples = load_face_samples(image_dir)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    suffix = '' if quantize == 'none' else f'_{quantize}'
+    output_path = os.path.join(OUTPUT_DIR, f'emotion_{source}{suffix}.{export_format}')
+
+    start = time.perf_counter()
+    if export_format == 'tflite':
+        export_tflite(model, output_path, quantize, samples)
+    else:
+        export_onnx(model, output_path, quantize, samples)
+    save_labels(output_path, labels)
+    print(f"[OK] Exported {output_path} ({os.path.getsize(output_path) / 1024:.0f} KB) "
+          f"in {time.perf_counter() - start:.1f}s, labels: {labels}")
+
+    parity_report(model, output_path, samples)
+    print(f"[INFO] Serve it with FACIAL_EMOTION_MODEL={output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Face Detection Backends
+Haar cascade (default), OpenCV DNN (ResNet-10 SSD) and YuNet detectors behind one interface
+Every backend returns an (N, 4) int array of (x, y, w, h) boxes
+EyeLocator/aligned_face_crop optionally level a detected face before emotion analysis
+"""
+
+import os
+import cv2
+import numpy as np
+
+# Model files for the DNN backends are not bundled with opencv-python, only the
+# loaders are. Download them into models/ or point the env variables at them.
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+YUNET_MODEL_PATH = os.getenv('YUNET_MODEL_PATH', os.path.join(MODELS_DIR, 'face_detection_yunet_2023mar.onnx'))
+DNN_FACE_PROTOTXT = os.getenv('DNN_FACE_PROTOTXT', os.path.join(MODELS_DIR, 'deploy.prototxt'))
+DNN_FACE_MODEL = os.getenv('DNN_FACE_MODEL', os.path.join(MODELS_DIR, 'res10_300x300_ssd_iter_140000_fp16.caffemodel'))
+
+
+def _as_boxes(boxes, min_size=0):
+    """Convert detector output to an (N, 4) int array and drop boxes below min_size"""
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 4), dtype=int)
+    boxes = np.round(np.asarray(boxes, dtype=np.float64)[:, :4]).astype(int)
+    keep = (boxes[:, 2] >= min_size) & (boxes[:, 3] >= min_size)
+    return boxes[keep]
+
+
+def _require_file(path, backend):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model file for '{backend}' face detector not found: {path}")
+
+
+class HaarFaceDetector:
+    """OpenCV Haar cascade (haarcascade_frontalface_default.xml)"""
+    name = 'haar'
+    needs_color = False
+
+    def __init__(self, scale_factor=1.05, min_neighbors=4, cascade_path=None):
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        cascade_path = cascade_path or cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise IOError(f"Could not load Haar cascade: {cascade_path}")
+
+    def detect(self, image, min_size=20):
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self.cascade.detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+            minSize=(min_size, min_size), flags=cv2.CASCADE_SCALE_IMAGE
+        )
+        return _as_boxes(faces)
+
+
+class DnnFaceDetector:
+    """OpenCV DNN ResNet-10 SSD face detector (Caffe, 300x300 input)"""
+    name = 'dnn'
+    needs_color = True
+
+    def __init__(self, prototxt_path=DNN_FACE_PROTOTXT, model_path=DNN_FACE_MODEL, confidence_threshold=0.5):
+        _require_file(prototxt_path, self.name)
+        _require_file(model_path, self.name)
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+        self.confidence_threshold = confidence_threshold
+
+    def detect(self, image, min_size=20):
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+
+        detections = detections[detections[:, 2] >= self.confidence_threshold]
+        corners = detections[:, 3:7] * np.array([width, height, width, height])
+        corners[:, [0, 2]] = np.clip(corners[:, [0, 2]], 0, width)
+        corners[:, [1, 3]] = np.clip(corners[:, [1, 3]], 0, height)
+        boxes = np.column_stack([corners[:, :2], corners[:, 2:] - corners[:, :2]])
+        return _as_boxes(boxes, min_size)
+
+
+class YuNetFaceDetector:
+    """OpenCV YuNet face detector (cv2.FaceDetectorYN, ONNX model)"""
+    name = 'yunet'
+    needs_color = True
+
+    def __init__(self, model_path=YUNET_MODEL_PATH, score_threshold=0.6, nms_threshold=0.3, top_k=5000):
+        _require_file(model_path, self.name)
+        self.detector = cv2.FaceDetectorYN.create(model_path, "", (320, 320), score_threshold, nms_threshold, top_k)
+        self.input_size = (320, 320)
+
+    def detect(self, image, min_size=20):
+        height, width = image.shape[:2]
+        if self.input_size != (width, height):
+            self.input_size = (width, height)
+            self.detector.setInputSize(self.input_size)
+        _, faces = self.detector.detect(image)
+        return _as_boxes(faces, min_size)
+
+
+class EyeLocator:
+    """
+    Eye centres of a detected face from OpenCV's Haar eye cascade, searched in
+    the upper half of the face box only; used to level faces before emotion analysis
+    """
+
+    def __init__(self, cascade_path=None, max_angle=30.0):
+        cascade_path = cascade_path or cv2.data.haarcascades + 'haarcascade_eye.xml'
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise IOError(f"Could not load Haar eye cascade: {cascade_path}")
+        self.max_angle = max_angle
+
+    def locate(self, gray, box):
+        """Returns: ((left_x, left_y), (right_x, right_y)) in image coordinates, or None"""
+        x, y, w, h = box
+        upper = gray[y:y + h // 2, x:x + w]
+        min_side = max(1, w // 8)
+        eyes = self.cascade.detectMultiScale(upper, scaleFactor=1.1, minNeighbors=5,
+                                             minSize=(min_side, min_side))
+        if len(eyes) < 2:
+            return None
+        # The two largest candidates, ordered left to right
+        eyes = sorted(sorted(eyes, key=lambda e: -e[2] * e[3])[:2], key=lambda e: e[0])
+        centres = [(x + ex + ew / 2.0, y + ey + eh / 2.0) for ex, ey, ew, eh in eyes]
+        (lx, ly), (rx, ry) = centres
+        if rx - lx < w / 5.0 or abs(np.degrees(np.arctan2(ry - ly, rx - lx))) > self.max_angle:
+            return None
+        return centres[0], centres[1]
+
+
+def aligned_face_crop(image, box, eyes, size):
+    """
+    Crop box from image rotated so the eyes are level, resized to size (w, h)
+    Rotation, crop and resize are one warpAffine on the original image, so the
+    corners are filled with real pixels instead of padding
+    """
+    x, y, w, h = box
+    (lx, ly), (rx, ry) = eyes
+    angle = np.degrees(np.arctan2(ry - ly, rx - lx))
+    centre = (x + w / 2.0, y + h / 2.0)
+    rotation = cv2.getRotationMatrix2D(centre, angle, 1.0)
+    # Scale and shift the rotated box into the output crop
+    scale = np.array([[size[0] / float(w)], [size[1] / float(h)]])
+    matrix = rotation * scale
+    matrix[:, 2] += np.array([size[0] / 2.0, size[1] / 2.0]) - scale[:, 0] * np.array(centre)
+    return cv2.warpAffine(image, matrix, size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+FACE_DETECTOR_BACKENDS = {
+    'haar': HaarFaceDetector,
+    'dnn': DnnFaceDetector,
+    'yunet': YuNetFaceDetector,
+}
+
+
+def create_face_detector(backend='haar', **options):
+    """Build a face detector backend by name ('haar', 'dnn' or 'yunet')"""
+    backend = (backend or 'haar').lower()
+    if backend not in FACE_DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown face detector backend '{backend}'. "
+                         f"Choose one of: {', '.join(FACE_DETECTOR_BACKENDS)}")
+    return FACE_DETECTOR_BACKENDS[backend](**options)
@@ -0,0 +1,308 @@
+"""
+Face Tracking for Live Video
+Follows faces between full detections with sparse optical flow so overlays
+update every frame, while face detection and emotion inference run at their
+own, lower cadence
+"""
+
+import time
+import cv2
+import numpy as np
+
+# Cadences in frames; detection also runs early when a track loses confidence
+DEFAULT_DETECT_EVERY = 10
+DEFAULT_EMOTION_EVERY = 15
+DEFAULT_MIN_CONFIDENCE = 0.5
+DEFAULT_IOU_THRESHOLD = 0.3
+DEFAULT_MAX_MISSES = 2
+
+# Motion gating: a face ROI whose 16x16 grayscale thumbnail differs from the one
+# its emotions were computed on by less than DEFAULT_MOTION_THRESHOLD (mean
+# absolute difference, 0-1 scale) reuses those emotions, for at most
+# DEFAULT_MOTION_MAX_REUSE consecutive checks
+DEFAULT_MOTION_THRESHOLD = 0.03
+DEFAULT_MOTION_MAX_REUSE = 30
+MOTION_THUMBNAIL_SIZE = (16, 16)
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+class MotionGate:
+    """
+    Cheap change detector that lets a video pipeline skip emotion inference
+    for faces that have not visibly changed
+
+    Faces are keyed either explicitly (e.g. by track id) or by IoU with the
+    faces seen on the previous call. skip_ratio in stats() is the fraction of
+    checks answered from a previous result, for tuning threshold against accuracy.
+    """
+
+    def __init__(self, threshold=DEFAULT_MOTION_THRESHOLD, max_reuse=DEFAULT_MOTION_MAX_REUSE,
+                 iou_threshold=0.5):
+        self.threshold = threshold
+        self.max_reuse = max_reuse
+        self.iou_threshold = iou_threshold
+        self._entries = {}
+        self._next_key = 0
+        self.checks = 0
+        self.skips = 0
+
+    def thumbnail(self, gray, box):
+        """Downsampled grayscale face ROI on a 0-1 scale"""
+        x, y, w, h = [int(v) for v in box]
+        roi = gray[max(0, y):y+h, max(0, x):x+w]
+        if roi.size == 0:
+            return None
+        return cv2.resize(roi, MOTION_THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32) / 255.0
+
+    def _match_keys(self, boxes):
+        """Key each box by its best-overlapping face from the previous call"""
+        keys, used = [], set()
+        for box in boxes:
+            best_key, best_iou = None, self.iou_threshold
+            for key, entry in self._entries.items():
+                iou = box_iou(box, entry['box'])
+                if key not in used and iou >= best_iou:
+                    best_key, best_iou = key, iou
+            if best_key is None:
+                best_key = self._next_key
+                self._next_key += 1
+            used.add(best_key)
+            keys.append(best_key)
+        return keys
+
+    def check(self, gray, boxes, keys=None):
+        """
+        Returns: (keys, thumbnails, reused) where reused[i] holds the previous
+        emotions for an unchanged face and None where inference is needed
+        """
+        if keys is None:
+            keys = self._match_keys(boxes)
+        thumbnails = [self.thumbnail(gray, box) for box in boxes]
+        reused = []
+        for key, thumb in zip(keys, thumbnails):
+            self.checks += 1
+            entry = self._entries.get(key)
+            if (entry is not None and thumb is not None and entry['reuse'] < self.max_reuse
+                    and float(np.mean(np.abs(thumb - entry['thumbnail']))) < self.threshold):
+                entry['reuse'] += 1
+                self.skips += 1
+                reused.append(entry['emotions'])
+            else:
+                reused.append(None)
+        return keys, thumbnails, reused
+
+    def update(self, keys, boxes, thumbnails, emotions_list, reused, keep_others=False):
+        """
+        Remember the faces of this call. Freshly inferred faces store their
+        thumbnail as the new reference; reused faces keep the reference their
+        emotions were computed on, so slow drift still triggers inference.
+        """
+        entries = dict(self._entries) if keep_others else {}
+        for key, box, thumb, emotions, was_reused in zip(keys, boxes, thumbnails, emotions_list, reused):
+            if was_reused is not None:
+                entry = self._entries[key]
+                entry['box'] = box
+                entries[key] = entry
+            elif emotions is not None and thumb is not None:
+                entries[key] = {'box': box, 'thumbnail': thumb, 'emotions': emotions, 'reuse': 0}
+        self._entries = entries
+
+    def retain(self, keys):
+        """Forget faces whose keys are no longer active"""
+        keys = set(keys)
+        self._entries = {key: entry for key, entry in self._entries.items() if key in keys}
+
+    def stats(self):
+        return {
+            'checks': self.checks,
+            'skips': self.skips,
+            'skip_ratio': round(self.skips / self.checks, 4) if self.checks else 0.0,
+            'threshold': self.threshold
+        }
+
+
+class FaceTrack:
+    """One tracked face: box, tracking confidence and its latest emotions"""
+
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = np.asarray(box, dtype=np.float64)
+        self.confidence = 1.0
+        self.misses = 0
+        self.emotions = None
+        self.frames_since_emotion = 0
+
+    def location(self):
+        return [int(round(v)) for v in self.box]
+
+
+class FaceTracker:
+    """
+    Live face tracker on top of a FacialStressDetector
+    - boxes are propagated every frame with Lucas-Kanade optical flow
+    - full detection runs every detect_every frames, or sooner when any track's
+      confidence drops below min_confidence; detections are matched to tracks by IoU
+    - emotions are re-estimated per track every emotion_every frames, batched
+      across all tracks that are due
+    """
+
+    def __init__(self, detector, detect_every=DEFAULT_DETECT_EVERY, emotion_every=DEFAULT_EMOTION_EVERY,
+                 min_confidence=DEFAULT_MIN_CONFIDENCE, iou_threshold=DEFAULT_IOU_THRESHOLD,
+                 max_misses=DEFAULT_MAX_MISSES, motion_threshold=DEFAULT_MOTION_THRESHOLD):
+        self.detector = detector
+        self.detect_every = detect_every
+        self.emotion_every = emotion_every
+        self.min_confidence = min_confidence
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        # Due tracks whose face has not changed reuse their emotions (None disables)
+        self.motion_gate = MotionGate(motion_threshold) if motion_threshold else None
+        self.tracks = []
+        self._next_track_id = 1
+        self._prev_gray = None
+        self._frame_index = 0
+        self.stats = {'frames': 0, 'detections': 0, 'emotion_inferences': 0, 'emotion_skips': 0}
+
+    def _propagate(self, track, prev_gray, gray):
+        """Shift a track's box by the median optical flow of corners inside it"""
+        height, width = gray.shape[:2]
+        x, y, w, h = track.location()
+        x, y = max(0, x), max(0, y)
+        w, h = min(w, width - x), min(h, height - y)
+        if w < 8 or h < 8:
+            track.confidence = 0.0
+            return
+
+        corners = cv2.goodFeaturesToTrack(prev_gray[y:y+h, x:x+w], maxCorners=30,
+                                          qualityLevel=0.01, minDistance=max(3, w // 10))
+        if corners is None or len(corners) < 3:
+            track.confidence *= 0.5
+            return
+
+        points = (corners.reshape(-1, 1, 2) + np.array([x, y], dtype=np.float32)).astype(np.float32)
+        moved, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, winSize=(15, 15), maxLevel=2)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, moved, None, winSize=(15, 15), maxLevel=2)
+
+        # Forward-backward check rejects points that did not track consistently
+        fb_error = np.linalg.norm((points - back).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < 1.0)
+        track.confidence = float(good.mean())
+        if good.sum() < 3:
+            return
+
+        shift = np.median((moved - points).reshape(-1, 2)[good], axis=0)
+        track.box[0] = np.clip(track.box[0] + shift[0], 0, width - track.box[2])
+        track.box[1] = np.clip(track.box[1] + shift[1], 0, height - track.box[3])
+
+    def _associate(self, detections):
+        """Greedy IoU matching of detections to tracks; spawns and retires tracks"""
+        pairs = sorted(
+            ((box_iou(track.box, det), t, d) for t, track in enumerate(self.tracks) for d, det in enumerate(detections)),
+            reverse=True
+        )
+        matched_tracks, matched_detections = set(), set()
+        for iou, t, d in pairs:
+            if iou < self.iou_threshold:
+                break
+            if t in matched_tracks or d in matched_detections:
+                continue
+            track = self.tracks[t]
+            track.box = np.asarray(detections[d], dtype=np.float64)
+            track.confidence = 1.0
+            track.misses = 0
+            matched_tracks.add(t)
+            matched_detections.add(d)
+
+        kept = []
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    continue
+            kept.append(track)
+        for d, det in enumerate(detections):
+            if d not in matched_detections:
+                kept.append(FaceTrack(self._next_track_id, det))
+                self._next_track_id += 1
+        self.tracks = kept
+
+    def update(self, frame):
+        """
+        Process one BGR frame
+        Returns: dict shaped like FacialStressDetector.process_frame, with
+        'track_id' and 'tracking_confidence' per face
+        """
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        if self._prev_gray is not None and self._prev_gray.shape == gray.shape:
+            for track in self.tracks:
+                self._propagate(track, self._prev_gray, gray)
+
+        low_confidence = any(track.confidence < self.min_confidence for track in self.tracks)
+        detection_ran = not self.tracks or low_confidence or self._frame_index % self.detect_every == 0
+        if detection_ran:
+            faces, _ = self.detector.detect_faces(frame, gray=gray)
+            self._associate(list(faces))
+            self.stats['detections'] += 1
+
+        # Emotion inference for every track that is due, in one batch
+        due = [track for track in self.tracks
+               if track.emotions is None or track.frames_since_emotion >= self.emotion_every]
+        if due:
+            boxes = [track.location() for track in due]
+            if self.motion_gate is not None:
+                self.motion_gate.retain(track.track_id for track in self.tracks)
+                emotions_list, skipped = self.detector.analyze_emotions_gated(
+                    frame, boxes, self.motion_gate, gray=gray, keys=[track.track_id for track in due]
+                )
+            else:
+                emotions_list = self.detector.analyze_emotions_batch(frame, boxes, gray=gray)
+                skipped = 0
+            for track, emotions in zip(due, emotions_list):
+                if emotions is not None:
+                    track.emotions = emotions
+                track.frames_since_emotion = 0
+            self.stats['emotion_inferences'] += len(due) - skipped
+            self.stats['emotion_skips'] += skipped
+        for track in self.tracks:
+            track.frames_since_emotion += 1
+
+        face_data_list = []
+        stress_scores = []
+        for track in self.tracks:
+            if track.emotions is None:
+                continue
+            face_data, stress_score = self.detector.build_face_data(track.track_id, track.emotions)
+            face_data['track_id'] = track.track_id
+            face_data['location'] = track.location()
+            face_data['emotions'] = track.emotions
+            face_data['tracking_confidence'] = round(track.confidence, 2)
+            face_data_list.append(face_data)
+            stress_scores.append(stress_score)
+
+        self._prev_gray = gray
+        self._frame_index += 1
+        self.stats['frames'] += 1
+
+        average_stress = float(np.mean(stress_scores)) if stress_scores else 0.0
+        overall_level = self.detector.get_overall_stress_level(average_stress) if stress_scores else "Unknown"
+        return {
+            'success': bool(face_data_list),
+            'faces_detected': len(face_data_list),
+            'average_stress_score': round(average_stress, 2),
+            'stress_level': overall_level,
+            'overall_stress_level': overall_level,
+            'face_data': face_data_list,
+            'detection_ran': detection_ran,
+            'emotion_updates': len(due),
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1)
+        }
@@ -5,59 +5,638 @@ Provides accurate emotion recognition and stress analysis with real face detecti
 
 import cv2
 import numpy as np
-from deepface import DeepFace
 from pathlib import Path
 import os
+import time
+import copy
+import hashlib
 import base64
+import queue
+import threading
+import multiprocessing
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
 from io import BytesIO
 from PIL import Image
+from face_detectors import create_face_detector, EyeLocator, aligned_face_crop
+from result_cache import TTLLRUCache
+from face_tracking import MotionGate, DEFAULT_MOTION_THRESHOLD
+from emotion_backends import load_exported_emotion_model, load_emotion_model_file
 
 # Suppress TensorFlow warnings
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
+# Output order of the DeepFace emotion model (48x48 grayscale CNN)
+DEEPFACE_EMOTION_LABELS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+EMOTION_INPUT_SIZE = (48, 48)
+
+# Canonical emotion order for stress scoring (alphabetical, as in train_emotion_model.py
+# and emotion_labels.pkl); emotion matrices passed to score_emotion_matrix use it
+EMOTION_ORDER = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']
+EMOTION_INDEX = {emotion: i for i, emotion in enumerate(EMOTION_ORDER)}
+
+# Stress weights based on psychological research, aligned with EMOTION_ORDER
+# Higher values = more stressful emotion
+STRESS_WEIGHTS = np.array([
+    0.90,   # angry    - very high stress: frustration/anger
+    0.70,   # disgust  - medium-high stress: disgust/aversion
+    0.95,   # fear     - highest stress: fear/anxiety
+    0.05,   # happy    - lowest stress: positive emotion
+    0.25,   # neutral  - low stress: baseline
+    0.80,   # sad      - high stress: depression/sadness
+    0.45,   # surprise - medium stress: uncertainty
+])
+# Upper bounds of every level but the last: score < 0.20 is "Very Low", and so on
+STRESS_LEVEL_THRESHOLDS = np.array([0.20, 0.35, 0.50, 0.70])
+STRESS_LEVELS = ['Very Low', 'Low', 'Moderate', 'High', 'Very High']
+
+# Exported emotion model (.onnx or .tflite, see export_emotion_model.py); when set,
+# emotion inference runs on onnxruntime / tflite_runtime and TensorFlow is never imported
+DEFAULT_EMOTION_MODEL_PATH = os.getenv('FACIAL_EMOTION_MODEL') or None
+
+# Confidence-gated cascade: a small fast model (e.g. emotion_model.keras from
+# train_emotion_model.py, or its export) answers first; faces whose top-two
+# probability margin is below DEFAULT_CASCADE_MIN_MARGIN or whose normalized
+# entropy (0-1) exceeds DEFAULT_CASCADE_MAX_ENTROPY escalate to the main model
+DEFAULT_CASCADE_MODEL_PATH = os.getenv('FACIAL_CASCADE_MODEL') or None
+DEFAULT_CASCADE_MIN_MARGIN = float(os.getenv('FACIAL_CASCADE_MIN_MARGIN', '0.2'))
+DEFAULT_CASCADE_MAX_ENTROPY = float(os.getenv('FACIAL_CASCADE_MAX_ENTROPY', '0.7'))
+CASCADE_LOG_EVERY = 100   # batches between escalation-rate log lines
+
+# Face detection defaults: detection runs on a copy whose longest side is at
+# most DEFAULT_DETECTION_MAX_SIDE pixels, boxes are mapped back to full size
+DEFAULT_DETECTION_MAX_SIDE = 640
+DEFAULT_SCALE_FACTOR = 1.05
+DEFAULT_MIN_NEIGHBORS = 4
+DEFAULT_MIN_FACE_SIZE = 20
+# Face detector backend: 'haar' (default), 'dnn' or 'yunet' (see face_detectors.py)
+DEFAULT_DETECTOR_BACKEND = os.getenv('FACE_DETECTOR_BACKEND', 'haar')
+# Level each detected face on its eye centres before emotion analysis (one Haar
+# eye pass per face); faces are already cropped, so DeepFace never re-detects them
+DEFAULT_ALIGN_FACES = os.getenv('FACIAL_ALIGN_FACES', '0') == '1'
+
+# Analysis result cache: exact content hash, optionally perceptual-hash near duplicates
+# (FACIAL_PERCEPTUAL_CACHE=1: re-encoded or slightly changed images reuse a result
+# whose dHash differs by at most FACIAL_PERCEPTUAL_MAX_DISTANCE of 64 bits)
+DEFAULT_CACHE_SIZE = 128
+DEFAULT_CACHE_TTL = 300.0
+DEFAULT_PERCEPTUAL_CACHE = os.getenv('FACIAL_PERCEPTUAL_CACHE', '0') == '1'
+DEFAULT_PERCEPTUAL_MAX_DISTANCE = int(os.getenv('FACIAL_PERCEPTUAL_MAX_DISTANCE', '4'))
+
+# Single camera captures (facial_stress.html): one MotionGate per capture session,
+# at most DEFAULT_CAPTURE_SESSIONS sessions, forgotten after DEFAULT_CAPTURE_SESSION_TTL
+DEFAULT_CAPTURE_SESSIONS = 256
+DEFAULT_CAPTURE_SESSION_TTL = 600.0
+
+# Live video: per-frame latency target for process_frame on a CPU-only node with
+# 640x480 webcam frames and LIVE_DETECTION_SETTINGS (about 10 frames per second)
+FRAME_LATENCY_BUDGET_MS = 100.0
+LIVE_DETECTION_SETTINGS = {'detection_max_side': 480, 'scale_factor': 1.1}
+
+# Optional process pool for emotion inference (0 = run on the request thread)
+DEFAULT_INFERENCE_WORKERS = int(os.getenv('FACIAL_INFERENCE_WORKERS', '0'))
+DEFAULT_INFERENCE_TIMEOUT = float(os.getenv('FACIAL_INFERENCE_TIMEOUT', '10'))
+
+# Cross-request micro-batching of in-process emotion inference
+DEFAULT_MICRO_BATCHING = os.getenv('FACIAL_MICRO_BATCHING', '0') == '1'
+DEFAULT_BATCH_MAX_WAIT_MS = float(os.getenv('FACIAL_BATCH_MAX_WAIT_MS', '5'))
+DEFAULT_BATCH_MAX_SIZE = int(os.getenv('FACIAL_BATCH_MAX_SIZE', '32'))
+
+
+# DeepFace pulls in TensorFlow, so it is imported on first use only
+DeepFace = None
+
+def _deepface():
+    global DeepFace
+    if DeepFace is None:
+        from deepface import DeepFace as deepface_api
+        DeepFace = deepface_api
+    return DeepFace
+
+
+def build_deepface_emotion_model():
+    """
+    DeepFace's emotion network as a callable model(batch, training=False) over
+    (N, 48, 48, 1) tensors, returning (N, 7) probabilities
+    deepface 0.0.75 (pinned) returns the Keras model itself; later releases wrap
+    it in an EmotionClient that keeps it under .model (and from 0.0.93 take task=)
+    """
+    api = _deepface()
+    try:
+        model = api.build_model('Emotion', task='facial_attribute')
+    except TypeError:
+        model = api.build_model('Emotion')
+    client = model
+    model = getattr(client, 'model', client)
+    if model is client or hasattr(model, 'predict_on_batch'):
+        return model
+    if not hasattr(client, '_predict_internal'):
+        from importlib.metadata import PackageNotFoundError, version
+        try:
+            installed = version('deepface')
+        except PackageNotFoundError:
+            installed = 'unknown'
+        raise RuntimeError(f"Unsupported DeepFace version {installed}: its {type(client).__name__} has neither "
+                           f"a Keras model nor a batch predict; install deepface==0.0.75 (requirements.txt)")
+    # ONNX/PyTorch clients of deepface >= 0.0.93: their batch path (private API)
+    # takes the same preprocessed tensors
+    def predict(batch, training=False):
+        return np.asarray(client._predict_internal(batch)).reshape(len(batch), -1)
+    return predict
+
+
+def content_hash(data):
+    """Exact content key for encoded image bytes or a decoded image array"""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data, np.ndarray):
+        digest.update(str(data.shape).encode())
+        data = np.ascontiguousarray(data)
+    digest.update(memoryview(data).cast('B'))
+    return digest.hexdigest()
+
+
+def difference_hash(img):
+    """64-bit perceptual difference hash (dHash) of a BGR or grayscale image"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def score_emotion_matrix(probabilities):
+    """
+    Vectorized stress scoring of an (N, 7) emotion probability matrix whose
+    columns follow EMOTION_ORDER; rows are normalized by their sum and rows
+    summing to zero score 0.5
+    Returns: (stress scores (N,), level indices into STRESS_LEVELS (N,),
+              dominant emotion indices into EMOTION_ORDER (N,))
+    """
+    probs = np.asarray(probabilities, dtype=np.float64)
+    if probs.ndim == 1:
+        probs = probs[np.newaxis, :]
+    totals = probs.sum(axis=1)
+    scores = np.divide(probs @ STRESS_WEIGHTS, totals, out=np.full(len(probs), 0.5), where=totals > 0)
+    levels = np.searchsorted(STRESS_LEVEL_THRESHOLDS, scores, side='right')
+    return scores, levels, probs.argmax(axis=1)
+
+
+def emotions_to_vector(emotions):
+    """Emotion dict (any label case) to a probability vector in EMOTION_ORDER; other labels are ignored"""
+    vector = np.zeros(len(EMOTION_ORDER))
+    for emotion, confidence in emotions.items():
+        index = EMOTION_INDEX.get(emotion.lower())
+        if index is not None:
+            vector[index] += confidence
+    return vector
+
+
+def stress_level_name(score):
+    """Stress level label for a single 0-1 stress score"""
+    return STRESS_LEVELS[int(np.searchsorted(STRESS_LEVEL_THRESHOLDS, score, side='right'))]
+
+
+def decode_image(image_bytes):
+    """
+    Decode encoded image bytes to a BGR array with cv2.imdecode, falling back to
+    PIL for formats OpenCV cannot read (e.g. GIF)
+    Returns: numpy array, or None when the bytes are not a readable image
+    """
+    if not image_bytes:
+        return None
+    img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is not None:
+        return img
+    try:
+        image = Image.open(BytesIO(image_bytes)).convert('RGB')
+    except Exception:
+        return None
+    return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+
+# Emotion-only detector living inside each inference pool process
+_worker_detector = None
+
+def _inference_worker_init(model_settings):
+    """Build and warm the emotion model(s) once per pool process"""
+    global _worker_detector
+    _worker_detector = FacialStressDetector(warm_up=True, cache_size=0, motion_threshold=None,
+                                            inference_workers=0, **model_settings)
+
+def _inference_worker_run(shm_name, shape, dtype, face_regions, align):
+    """Attach to the frame in shared memory and run batched emotion inference"""
+    # Pool processes share the parent's resource tracker, and the parent unlinks the segment
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        emotions_list = _worker_detector.analyze_emotions_batch(frame, face_regions, align=align)
+        del frame
+        return emotions_list
+    finally:
+        shm.close()
+
+
+class InferencePool:
+    """
+    Runs emotion inference in separate processes so TensorFlow does not compete
+    with request handling for the GIL. Decoded frames are copied once into
+    multiprocessing.shared_memory instead of being pickled; only the face
+    boxes and the resulting emotion dicts cross the process boundary.
+    """
+    
+    def __init__(self, workers, timeout=DEFAULT_INFERENCE_TIMEOUT, model_settings=None):
+        # spawn, not fork: TensorFlow state does not survive a fork
+        # model_settings: emotion model keyword arguments for the workers' detectors
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inference_worker_init, initargs=(model_settings or {},)
+        )
+        self.workers = workers
+        self.timeout = timeout
+        self.stats = {'requests': 0, 'timeouts': 0}
+    
+    def analyze(self, frame, face_regions, timeout=None, align=True):
+        """Emotion dicts for face_regions of frame; raises TimeoutError past the timeout"""
+        timeout = self.timeout if timeout is None else timeout
+        frame = np.ascontiguousarray(frame)
+        shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+        
+        def release(_future=None):
+            shm.close()
+            shm.unlink()
+        
+        try:
+            shared_frame = np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)
+            shared_frame[...] = frame
+            del shared_frame
+            future = self.executor.submit(
+                _inference_worker_run, shm.name, frame.shape, frame.dtype.str,
+                [tuple(int(v) for v in face_region) for face_region in face_regions], align
+            )
+        except Exception:
+            release()
+            raise
+        
+        self.stats['requests'] += 1
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self.stats['timeouts'] += 1
+            if future.cancel():
+                release()
+            else:
+                # Still running: free the frame only once the worker is done with it
+                future.add_done_callback(release)
+            raise TimeoutError(f"Emotion inference timed out after {timeout:g}s")
+        except Exception:
+            release()
+            raise
+        release()
+        return result
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class EmotionBatcher:
+    """
+    Dynamic micro-batching scheduler for emotion inference
+    Concurrent callers enqueue their preprocessed (n, 48, 48, 1) face tensors; a
+    single scheduler thread runs one forward pass over everything collected and
+    hands each caller back its own rows.
+    
+    Requests announce themselves with request() when their analysis starts (before
+    face detection). After the first arrival the scheduler keeps collecting for up
+    to max_wait_ms (or until max_batch_size faces are queued) while announced
+    requests have not reached predict() yet. A request alone in the process (always
+    the case with sync gunicorn workers) never waits; merging needs gthread
+    workers, see gunicorn.conf.py.
+    """
+    
+    def __init__(self, predict_fn, max_wait_ms=DEFAULT_BATCH_MAX_WAIT_MS, max_batch_size=DEFAULT_BATCH_MAX_SIZE):
+        self.predict_fn = predict_fn
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._expected = 0   # announced requests whose faces have not been collected yet
+        self._local = threading.local()
+        self._stats = {'batches': 0, 'faces': 0, 'requests': 0, 'largest_batch': 0,
+                       'max_queue_depth': 0, 'total_wait_ms': 0.0}
+        self._thread = threading.Thread(target=self._run, name='emotion-batcher', daemon=True)
+        self._thread.start()
+    
+    @contextmanager
+    def request(self):
+        """Announce one request for the duration of its analysis (nested calls count once)"""
+        if getattr(self._local, 'depth', 0):
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+        self._local.depth, self._local.expected = 1, True
+        with self._stats_lock:
+            self._expected += 1
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            if self._local.expected:
+                # Finished without reaching predict() (no faces, cache hit, error)
+                self._local.expected = False
+                with self._stats_lock:
+                    self._expected -= 1
+    
+    def predict(self, batch):
+        """Block until the scheduler has run inference for this batch; returns its predictions"""
+        future = Future()
+        # Only the first predict() of an announced request was expected by the scheduler
+        expected = getattr(self._local, 'expected', False)
+        self._local.expected = False
+        self._queue.put((batch, future, time.perf_counter(), expected))
+        with self._stats_lock:
+            self._stats['max_queue_depth'] = max(self._stats['max_queue_depth'], self._queue.qsize())
+        return future.result()
+    
+    def _take(self, item):
+        if item[3]:
+            with self._stats_lock:
+                self._expected -= 1
+        return item
+    
+    def _collect(self):
+        """First queued request plus whatever arrives within max_wait, up to max_batch_size faces"""
+        pending = [self._take(self._queue.get())]
+        size = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            with self._stats_lock:
+                others_coming = self._expected > 0
+            # Hold the window open only while other requests are still on their way
+            remaining = deadline - time.perf_counter() if others_coming else 0
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.append(self._take(item))
+            size += len(item[0])
+        return pending, size
+    
+    def _run(self):
+        while True:
+            pending, size = self._collect()
+            started = time.perf_counter()
+            try:
+                predictions = self.predict_fn(np.concatenate([batch for batch, _, _, _ in pending]))
+                offset = 0
+                for batch, future, _, _ in pending:
+                    future.set_result(predictions[offset:offset + len(batch)])
+                    offset += len(batch)
+            except Exception as e:
+                for _, future, _, _ in pending:
+                    future.set_exception(e)
+            
+            with self._stats_lock:
+                self._stats['batches'] += 1
+                self._stats['faces'] += size
+                self._stats['requests'] += len(pending)
+                self._stats['largest_batch'] = max(self._stats['largest_batch'], size)
+                self._stats['total_wait_ms'] += sum((started - queued) * 1000 for _, _, queued, _ in pending)
+    
+    def stats(self):
+        """Queue depth and batch-size metrics"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        total_wait_ms = stats.pop('total_wait_ms')
+        stats['queue_depth'] = self._queue.qsize()
+        stats['mean_batch_size'] = round(stats['faces'] / stats['batches'], 2) if stats['batches'] else 0.0
+        stats['mean_queue_wait_ms'] = round(total_wait_ms / stats['requests'], 2) if stats['requests'] else 0.0
+        stats['max_wait_ms'] = self.max_wait * 1000
+        stats['max_batch_size'] = self.max_batch_size
+        return stats
+
+
 class FacialStressDetector:
-    def __init__(self):
-        """Initialize facial stress detection with DeepFace"""
-        self.face_cascade = None
+    def __init__(self, warm_up=False, detection_max_side=DEFAULT_DETECTION_MAX_SIDE,
+                 scale_factor=DEFAULT_SCALE_FACTOR, min_neighbors=DEFAULT_MIN_NEIGHBORS,
+                 min_face_size=DEFAULT_MIN_FACE_SIZE, detector_backend=DEFAULT_DETECTOR_BACKEND,
+                 detector_options=None, cache_size=DEFAULT_CACHE_SIZE, cache_ttl=DEFAULT_CACHE_TTL,
+                 perceptual_cache=DEFAULT_PERCEPTUAL_CACHE, perceptual_max_distance=DEFAULT_PERCEPTUAL_MAX_DISTANCE,
+                 motion_threshold=DEFAULT_MOTION_THRESHOLD, inference_workers=DEFAULT_INFERENCE_WORKERS,
+                 inference_timeout=DEFAULT_INFERENCE_TIMEOUT, micro_batching=DEFAULT_MICRO_BATCHING,
+                 batch_max_wait_ms=DEFAULT_BATCH_MAX_WAIT_MS, batch_max_size=DEFAULT_BATCH_MAX_SIZE,
+                 emotion_model_path=DEFAULT_EMOTION_MODEL_PATH, cascade_model_path=DEFAULT_CASCADE_MODEL_PATH,
+                 cascade_min_margin=DEFAULT_CASCADE_MIN_MARGIN, cascade_max_entropy=DEFAULT_CASCADE_MAX_ENTROPY,
+                 align_faces=DEFAULT_ALIGN_FACES):
+        """
+        Initialize facial stress detection with DeepFace
+        warm_up=True builds the emotion model and runs a dummy inference immediately
+        detection_max_side: longest side of the image used for face detection
+                            (None or 0 detects at full resolution)
+        scale_factor, min_neighbors: Haar cascade detectMultiScale settings
+        min_face_size: smallest face to report, in full-resolution pixels
+        detector_backend: 'haar', 'dnn' or 'yunet'; detector_options are passed to it
+        cache_size, cache_ttl: bounds of the analysis result cache (cache_size=0 disables it)
+        perceptual_cache: also reuse results of near-identical images whose dHash differs
+                          by at most perceptual_max_distance bits
+        motion_threshold: process_frame (and captures analyzed with a capture_session)
+                          reuses emotions of face ROIs that changed less than this since
+                          they were analyzed (None disables gating)
+        inference_workers: run emotion inference in this many separate processes
+                           (0 keeps it in-process); each call waits at most inference_timeout
+        micro_batching: merge in-process emotion inference of concurrent requests into
+                        shared forward passes (batch_max_wait_ms, batch_max_size)
+        emotion_model_path: exported .onnx/.tflite emotion model to serve instead of
+                            DeepFace's Keras network (None uses DeepFace)
+        cascade_model_path: small emotion model (.keras, .onnx or .tflite) tried first;
+                            faces with a top-two margin below cascade_min_margin or a
+                            normalized entropy above cascade_max_entropy escalate to the
+                            main model (None disables the cascade)
+        align_faces: rotate each face so its eyes are level before emotion analysis
+                     (faces without two detectable eyes are used as cropped)
+        """
+        self.detection_max_side = detection_max_side
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_face_size = min_face_size
+        self.detector_backend = detector_backend
+        self.detector_options = detector_options or {}
+        self.result_cache = TTLLRUCache(cache_size, cache_ttl) if cache_size else None
+        self.perceptual_cache = perceptual_cache
+        self.perceptual_max_distance = perceptual_max_distance
+        self.face_detector = None
+        self.align_faces = align_faces
+        self.eye_locator = None
+        self.emotion_model_path = emotion_model_path
+        self.emotion_model = None
+        self.emotion_labels = DEEPFACE_EMOTION_LABELS
+        self.cascade_model_path = cascade_model_path
+        self.cascade_min_margin = cascade_min_margin
+        self.cascade_max_entropy = cascade_max_entropy
+        self.cascade_model = None
+        self.cascade_labels = None
+        self.cascade_stats = {'batches': 0, 'faces': 0, 'escalated': 0, 'escalated_batches': 0, 'total_ms': 0.0}
+        self._cascade_lock = threading.Lock()
+        self.ready = False
+        self.startup_timings = {}
+        # Buffers reused between process_frame calls (live video path only)
+        self._frame_gray = None
+        self._frame_batch = None
+        self.motion_threshold = motion_threshold
+        self.motion_gate = MotionGate(motion_threshold) if motion_threshold else None
+        # capture session -> (MotionGate, lock) for independent single-capture requests
+        self.capture_gates = (TTLLRUCache(DEFAULT_CAPTURE_SESSIONS, DEFAULT_CAPTURE_SESSION_TTL)
+                              if motion_threshold else None)
+        self._capture_gates_lock = threading.Lock()
+        self._capture_gate_checks = 0
+        self._capture_gate_skips = 0
+        model_settings = {
+            'emotion_model_path': emotion_model_path, 'cascade_model_path': cascade_model_path,
+            'cascade_min_margin': cascade_min_margin, 'cascade_max_entropy': cascade_max_entropy,
+            'align_faces': align_faces
+        }
+        self.inference_pool = (InferencePool(inference_workers, inference_timeout, model_settings)
+                               if inference_workers else None)
+        self.batcher = (EmotionBatcher(self._predict_emotion_tensor, batch_max_wait_ms, batch_max_size)
+                        if micro_batching else None)
+        self.frame_stats = {'frames': 0, 'over_budget': 0, 'last_latency_ms': 0.0}
         self.load_models()
+        if warm_up:
+            self.warm_up()
         
     def load_models(self):
-        """Load face detection cascade classifier"""
+        """Load the configured face detector backend (Haar cascade by default)"""
         try:
-            # Load face detection cascade classifier
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
-            print("[OK] Face cascade classifier loaded")
-            print("[OK] DeepFace will be used for emotion detection (VGG-Face backend)")
+            start = time.perf_counter()
+            options = dict(self.detector_options)
+            if self.detector_backend == 'haar':
+                options.setdefault('scale_factor', self.scale_factor)
+                options.setdefault('min_neighbors', self.min_neighbors)
+            try:
+                self.face_detector = create_face_detector(self.detector_backend, **options)
+            except Exception as e:
+                if self.detector_backend == 'haar':
+                    raise
+                print(f"[WARNING] Face detector '{self.detector_backend}' unavailable ({e}), using Haar cascade")
+                self.detector_backend = 'haar'
+                self.face_detector = create_face_detector(
+                    'haar', scale_factor=self.scale_factor, min_neighbors=self.min_neighbors
+                )
+            self.startup_timings['face_detector_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            print(f"[OK] Face detector '{self.detector_backend}' loaded ({self.startup_timings['face_detector_ms']} ms)")
+            if self.align_faces:
+                try:
+                    self.eye_locator = EyeLocator()
+                    print("[OK] Faces will be aligned on their eye centres")
+                except Exception as e:
+                    print(f"[WARNING] Eye detector unavailable ({e}), faces are not aligned")
+            if self.emotion_model_path:
+                print(f"[OK] Exported emotion model will be used: {self.emotion_model_path}")
+            else:
+                print("[OK] DeepFace will be used for emotion detection (VGG-Face backend)")
+            if self.cascade_model_path:
+                print(f"[OK] Fast emotion model tried first: {self.cascade_model_path} "
+                      f"(escalate below margin {self.cascade_min_margin} / above entropy {self.cascade_max_entropy})")
         except Exception as e:
             print(f"[ERROR] Error loading facial models: {e}")
     
-    def detect_faces(self, frame):
-        """Detect faces in frame using cascade classifier"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray, scaleFactor=1.05, minNeighbors=4, minSize=(20, 20), flags=cv2.CASCADE_SCALE_IMAGE
-        )
+    def detect_faces(self, frame, gray=None):
+        """
+        Detect faces in frame using the configured detector backend
+        Detection runs on a copy downscaled to detection_max_side and the boxes
+        are mapped back to full-resolution (x, y, w, h) coordinates
+        gray: optional precomputed grayscale version of frame
+        """
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        
+        # Haar works on grayscale, the DNN backends want the BGR frame
+        source = frame if self.face_detector.needs_color else gray
+        scale = 1.0
+        detection_image = source
+        if self.detection_max_side and max(height, width) > self.detection_max_side:
+            scale = self.detection_max_side / float(max(height, width))
+            detection_size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            detection_image = cv2.resize(source, detection_size, interpolation=cv2.INTER_AREA)
+        
+        min_side = max(1, int(round(self.min_face_size * scale)))
+        faces = self.face_detector.detect(detection_image, min_size=min_side)
+        
+        if len(faces) == 0:
+            return np.empty((0, 4), dtype=int), gray
+        
+        faces = np.asarray(faces, dtype=np.float64)
+        if scale != 1.0:
+            faces = faces / scale
+        faces = np.round(faces).astype(int)
+        
+        # Keep mapped boxes inside the full-resolution image
+        faces[:, 0] = np.clip(faces[:, 0], 0, width - 1)
+        faces[:, 1] = np.clip(faces[:, 1], 0, height - 1)
+        faces[:, 2] = np.minimum(faces[:, 2], width - faces[:, 0])
+        faces[:, 3] = np.minimum(faces[:, 3], height - faces[:, 1])
         return faces, gray
     
-    def analyze_emotion_deepface(self, frame, face_region):
+    def _face_crop(self, image, face_region, size=None, gray=None, align=True):
+        """
+        ROI of face_region in image, resized to size (w, h) when given
+        With align_faces the crop is rotated so the eyes (located on gray) are level
+        """
+        x, y, w, h = face_region
+        if align and self.eye_locator is not None:
+            if gray is None:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            eyes = self.eye_locator.locate(gray, face_region)
+            if eyes is not None:
+                return aligned_face_crop(image, face_region, eyes, size or (w, h))
+        face_roi = image[y:y+h, x:x+w]
+        if size is None:
+            return face_roi
+        return cv2.resize(face_roi, size, interpolation=cv2.INTER_AREA)
+    
+    def analyze_emotion_deepface(self, frame, face_region, align=True):
         """
         Analyze emotions using DeepFace (highly accurate pre-trained models)
+        face_region is an already detected face, so DeepFace's own detector is skipped
+        align=False for crops that were aligned before (face strips)
         Returns: emotion_dict with all emotion probabilities
         """
+        if self.batcher is not None:
+            # Join the cross-request batch instead of a standalone forward pass
+            try:
+                batch = self._prepare_emotion_batch(frame, [face_region], align=align)
+                return self._emotions_from_predictions(self.batcher.predict(batch))[0]
+            except Exception as e:
+                print(f"[WARNING] Micro-batched emotion inference failed, using DeepFace.analyze: {e}")
+        
+        if self.emotion_model_path:
+            # Exported models serve single faces as a batch of one; no TensorFlow fallback
+            try:
+                batch = self._prepare_emotion_batch(frame, [face_region], align=align)
+                return self._emotions_from_predictions(self._predict_emotion_tensor(batch))[0]
+            except Exception as e:
+                print(f"[WARNING] Exported emotion model error: {e}")
+                return None
+        
         try:
-            x, y, w, h = face_region
-            face_roi = frame[y:y+h, x:x+w]
+            face_roi = self._face_crop(frame, face_region, align=align)
             
-            # Convert BGR to RGB for DeepFace
-            face_rgb = cv2.cvtColor(face_roi, cv2.COLOR_BGR2RGB)
+            # Convert BGR (or grayscale face strips, see analyze_images) to RGB for DeepFace
+            face_rgb = cv2.cvtColor(face_roi, cv2.COLOR_GRAY2RGB if face_roi.ndim == 2 else cv2.COLOR_BGR2RGB)
             
             # Use DeepFace for emotion analysis with VGG-Face backend (most accurate)
+            # detector_backend='skip': the ROI already is the face, so DeepFace does not
+            # run face detection on it again (it cannot align it either, see _face_crop)
             # enforce_detection=False allows analysis even on edge cases
-            analysis = DeepFace.analyze(
+            analysis = _deepface().analyze(
                 face_rgb, 
                 actions=['emotion'], 
+                detector_backend='skip',
                 enforce_detection=False,
+                align=False,
                 silent=True
             )
             
@@ -73,59 +652,242 @@ class FacialStressDetector:
             print(f"[WARNING] DeepFace analysis error: {e}")
             return None
     
-    def analyze_stress_from_emotions(self, emotions_detected):
+    def load_emotion_model(self):
+        """Build the emotion network (DeepFace or exported model) once and keep the handle"""
+        if self.emotion_model is None:
+            if self.emotion_model_path:
+                self.emotion_model, labels = load_exported_emotion_model(self.emotion_model_path)
+                self.emotion_labels = labels
+            else:
+                self.emotion_model = build_deepface_emotion_model()
+        return self.emotion_model
+    
+    def warm_up(self):
         """
-        Analyze stress level based on detected emotions
-        Uses research-based stress mapping
-        Returns: stress_score (0-1), stress_level (string), recommendations (list)
+        Build the emotion model and run dummy inferences so the first real
+        request does not pay for model construction or kernel initialisation
+        Returns: True when the detector is ready to serve
         """
-        if emotions_detected is None:
-            return 0.5, "Unknown", ["Unable to analyze emotions"]
+        try:
+            if self.inference_pool is not None:
+                # The model lives in the pool processes; one round trip starts and warms them
+                start = time.perf_counter()
+                dummy_frame = np.zeros((EMOTION_INPUT_SIZE[1], EMOTION_INPUT_SIZE[0], 3), dtype=np.uint8)
+                self.inference_pool.analyze(dummy_frame, [(0, 0, EMOTION_INPUT_SIZE[0], EMOTION_INPUT_SIZE[1])],
+                                            timeout=max(self.inference_pool.timeout, 120))
+                self.startup_timings['inference_pool_warmup_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            else:
+                start = time.perf_counter()
+                self.load_emotion_model()
+                self.startup_timings['emotion_model_build_ms'] = round((time.perf_counter() - start) * 1000, 1)
+                
+                start = time.perf_counter()
+                dummy_batch = np.zeros((1, EMOTION_INPUT_SIZE[1], EMOTION_INPUT_SIZE[0], 1), dtype=np.float32)
+                self.emotion_model(dummy_batch, training=False)
+                self.startup_timings['emotion_dummy_inference_ms'] = round((time.perf_counter() - start) * 1000, 1)
+                
+                if self.cascade_model_path:
+                    start = time.perf_counter()
+                    self.load_cascade_model()(dummy_batch, training=False)
+                    self.startup_timings['cascade_model_warmup_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            
+            start = time.perf_counter()
+            self.detect_faces(np.zeros((240, 320, 3), dtype=np.uint8))
+            self.startup_timings['face_detection_warmup_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            
+            self.ready = True
+            timings = ", ".join(f"{stage}={ms} ms" for stage, ms in self.startup_timings.items())
+            print(f"[OK] Facial stress detector warmed up ({timings})")
+        except Exception as e:
+            print(f"[ERROR] Emotion model warm-up failed: {e}")
+        return self.ready
+    
+    def _prepare_emotion_batch(self, frame, face_regions, gray=None, out=None, align=True):
+        """
+        Crop, resize and stack face ROIs into one (N, 48, 48, 1) tensor
+        Mirrors DeepFace's emotion preprocessing: grayscale, 48x48, scaled to 0-1
+        gray: optional precomputed grayscale version of frame
+        out: optional preallocated float32 buffer with room for at least N faces
+        align: level faces on their eyes when align_faces is enabled
+        """
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if out is None:
+            batch = np.empty((len(face_regions), EMOTION_INPUT_SIZE[1], EMOTION_INPUT_SIZE[0], 1), dtype=np.float32)
+        else:
+            batch = out[:len(face_regions)]
         
-        # Stress weights based on psychological research
-        # Higher values = more stressful emotion
-        stress_weights = {
-            'fear': 0.95,        # Highest stress - fear/anxiety
-            'angry': 0.90,       # Very high stress - frustration/anger
-            'sad': 0.80,         # High stress - depression/sadness
-            'disgust': 0.70,     # Medium-high stress - disgust/aversion
-            'surprise': 0.45,    # Medium stress - uncertainty
-            'neutral': 0.25,     # Low stress - baseline
-            'happy': 0.05        # Lowest stress - positive emotion
-        }
+        for i, face_region in enumerate(face_regions):
+            batch[i, :, :, 0] = self._face_crop(gray, face_region, EMOTION_INPUT_SIZE, gray=gray, align=align)
         
-        # Calculate weighted stress score
-        stress_score = 0.0
-        total_weight = 0.0
+        batch /= 255.0
+        return batch
+    
+    def analyze_emotions_batch(self, frame, face_regions, gray=None, out=None, align=True):
+        """
+        Analyze emotions for all faces of one image with a single forward pass
+        align=False skips face alignment (regions of already aligned crops)
+        Returns: list of emotion dicts (0-1 range), one per face region
+        """
+        if len(face_regions) == 0:
+            return []
         
-        for emotion, confidence in emotions_detected.items():
-            emotion_lower = emotion.lower()
-            weight = stress_weights.get(emotion_lower, 0.5)
-            stress_score += weight * confidence
-            total_weight += confidence
+        if self.inference_pool is not None:
+            # Timeouts propagate: falling back in-process would block the request
+            return self.inference_pool.analyze(frame, face_regions, align=align)
         
-        # Normalize stress score
-        if total_weight > 0:
-            stress_score = stress_score / total_weight
-        else:
-            stress_score = 0.5
-        
-        # Determine stress level
-        if stress_score < 0.20:
-            stress_level = "Very Low"
-        elif stress_score < 0.35:
-            stress_level = "Low"
-        elif stress_score < 0.50:
-            stress_level = "Moderate"
-        elif stress_score < 0.70:
-            stress_level = "High"
-        else:
-            stress_level = "Very High"
+        try:
+            batch = self._prepare_emotion_batch(frame, face_regions, gray=gray, out=out, align=align)
+            if self.cascade_model_path:
+                return self._analyze_emotions_cascade(batch)
+            if self.batcher is not None:
+                predictions = self.batcher.predict(batch)
+            else:
+                predictions = self._predict_emotion_tensor(batch)
+        except Exception as e:
+            # Fall back to one DeepFace.analyze call per face
+            print(f"[WARNING] Batched emotion inference failed, using per-face analysis: {e}")
+            return [self.analyze_emotion_deepface(frame, face_region, align=align) for face_region in face_regions]
         
-        # Generate recommendations based on stress level
-        recommendations = self._get_recommendations(stress_level)
+        return self._emotions_from_predictions(predictions)
+    
+    def _predict_emotion_tensor(self, batch):
+        """One forward pass of the emotion model over an (N, 48, 48, 1) tensor"""
+        model = self.load_emotion_model()
+        return np.asarray(model(batch, training=False))
+    
+    def _emotions_from_predictions(self, predictions, labels=None):
+        """Convert (N, 7) emotion model outputs to per-face emotion dicts (0-1 range)"""
+        labels = self.emotion_labels if labels is None else labels
+        emotions_list = []
+        for row in predictions:
+            total = float(row.sum())
+            if total <= 0:
+                emotions_list.append(None)
+                continue
+            emotions_list.append({
+                emotion: float(row[i]) / total for i, emotion in enumerate(labels)
+            })
+        return emotions_list
+    
+    def load_cascade_model(self):
+        """Load the fast first-tier emotion model once and keep the handle"""
+        if self.cascade_model is None:
+            self.cascade_model, self.cascade_labels = load_emotion_model_file(self.cascade_model_path)
+        return self.cascade_model
+    
+    def _cascade_uncertain(self, predictions):
+        """Boolean mask of faces whose fast-model prediction is too uncertain to keep"""
+        probs = predictions / np.maximum(predictions.sum(axis=1, keepdims=True), 1e-12)
+        top_two = -np.partition(-probs, 1, axis=1)[:, :2]
+        margin = top_two[:, 0] - top_two[:, 1]
+        entropy = -np.sum(probs * np.log(np.clip(probs, 1e-12, 1.0)), axis=1) / np.log(probs.shape[1])
+        return (margin < self.cascade_min_margin) | (entropy > self.cascade_max_entropy)
+    
+    def _analyze_emotions_cascade(self, batch):
+        """
+        Fast model on the whole batch; only uncertain faces go through the main
+        emotion model (micro-batched when enabled)
+        """
+        start = time.perf_counter()
+        fast = np.asarray(self.load_cascade_model()(batch, training=False), dtype=np.float64)
+        escalate = self._cascade_uncertain(fast)
+        emotions_list = self._emotions_from_predictions(fast, self.cascade_labels)
+        
+        escalated = np.flatnonzero(escalate)
+        if len(escalated):
+            escalated_batch = batch[escalated]
+            if self.batcher is not None:
+                predictions = self.batcher.predict(escalated_batch)
+            else:
+                predictions = self._predict_emotion_tensor(escalated_batch)
+            for i, emotions in zip(escalated, self._emotions_from_predictions(predictions)):
+                emotions_list[i] = emotions
         
-        return stress_score, stress_level, recommendations
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._cascade_lock:
+            stats = self.cascade_stats
+            stats['batches'] += 1
+            stats['faces'] += len(batch)
+            stats['escalated'] += len(escalated)
+            stats['escalated_batches'] += int(len(escalated) > 0)
+            stats['total_ms'] += elapsed_ms
+            log_now = stats['batches'] % CASCADE_LOG_EVERY == 0
+        if log_now:
+            cascade = self.get_cascade_stats()
+            print(f"[INFO] Emotion cascade: {cascade['escalation_rate'] * 100:.1f}% of faces escalated "
+                  f"over {cascade['batches']} batches, mean {cascade['mean_latency_ms']} ms per batch")
+        return emotions_list
+    
+    def get_cascade_stats(self):
+        """Escalation counters of the emotion cascade (in-process inference only)"""
+        if not self.cascade_model_path:
+            return {'enabled': False}
+        with self._cascade_lock:
+            stats = dict(self.cascade_stats)
+        return {
+            'enabled': True,
+            'batches': stats['batches'],
+            'faces': stats['faces'],
+            'escalated_faces': stats['escalated'],
+            'escalated_batches': stats['escalated_batches'],
+            'escalation_rate': round(stats['escalated'] / stats['faces'], 4) if stats['faces'] else 0.0,
+            'mean_latency_ms': round(stats['total_ms'] / stats['batches'], 2) if stats['batches'] else 0.0,
+            'min_margin': self.cascade_min_margin,
+            'max_entropy': self.cascade_max_entropy
+        }
+    
+    def analyze_emotions_gated(self, frame, face_regions, motion_gate, gray=None, keys=None, out=None):
+        """
+        Batched emotion analysis that skips faces the motion gate reports as unchanged
+        Returns: (list of emotion dicts, number of faces whose inference was skipped)
+        """
+        if gray is None:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Explicitly keyed faces (tracks) persist until retired; IoU-keyed ones are per call
+        keep_others = keys is not None
+        keys, thumbnails, reused = motion_gate.check(gray, face_regions, keys)
+        
+        pending = [i for i, emotions in enumerate(reused) if emotions is None]
+        emotions_list = list(reused)
+        if pending:
+            fresh = self.analyze_emotions_batch(frame, [face_regions[i] for i in pending], gray=gray, out=out)
+            for i, emotions in zip(pending, fresh):
+                emotions_list[i] = emotions
+        
+        motion_gate.update(keys, face_regions, thumbnails, emotions_list, reused, keep_others=keep_others)
+        return emotions_list, len(face_regions) - len(pending)
+    
+    def analyze_stress_from_emotions(self, emotions_detected):
+        """
+        Analyze stress level based on detected emotions
+        Uses research-based stress mapping (STRESS_WEIGHTS, see score_emotion_matrix)
+        Returns: stress_score (0-1), stress_level (string), recommendations (list)
+        """
+        if emotions_detected is None:
+            return 0.5, "Unknown", ["Unable to analyze emotions"]
+        
+        scores, levels, _ = score_emotion_matrix(emotions_to_vector(emotions_detected))
+        stress_level = STRESS_LEVELS[levels[0]]
+        return float(scores[0]), stress_level, self._get_recommendations(stress_level)
+    
+    def analyze_stress_from_matrix(self, probabilities):
+        """
+        Stress analysis of every row of an (N, 7) emotion probability matrix (or
+        one length-7 vector) whose columns follow EMOTION_ORDER
+        Returns: list of dicts with dominant_emotion, stress_score, stress_level
+        and recommendations, one per row
+        """
+        scores, levels, dominant = score_emotion_matrix(probabilities)
+        return [
+            {
+                'dominant_emotion': EMOTION_ORDER[emotion_index],
+                'stress_score': float(score),
+                'stress_level': STRESS_LEVELS[level],
+                'recommendations': self._get_recommendations(STRESS_LEVELS[level])
+            }
+            for score, level, emotion_index in zip(scores, levels, dominant)
+        ]
     
     def _get_recommendations(self, stress_level):
         """Generate wellness recommendations based on stress level"""
@@ -164,190 +926,361 @@ class FacialStressDetector:
         
         return recommendations_map.get(stress_level, ["Recommendations unavailable"])
     
-    def get_facial_stress_analysis(self, image_path):
+    def get_overall_stress_level(self, average_stress):
+        """Map an average stress score to the overall stress level"""
+        return stress_level_name(average_stress)
+    
+    def build_face_data(self, face_id, emotions):
+        """Per-face result dict from an emotion dict; also returns the raw stress score"""
+        stress_score, stress_level, recommendations = self.analyze_stress_from_emotions(emotions)
+        dominant_emotion = max(emotions, key=emotions.get)
+        face_data = {
+            'face_id': face_id,
+            'stress_score': round(stress_score, 2),
+            'stress_level': stress_level,
+            'dominant_emotion': dominant_emotion,
+            'emotion_confidence': round(emotions[dominant_emotion], 2),
+            'all_emotions': {emotion: round(conf, 4) for emotion, conf in emotions.items()},
+            'recommendations': recommendations
+        }
+        return face_data, stress_score
+    
+    def process_frame(self, frame):
         """
-        Main function to analyze stress from facial image
-        Returns: comprehensive stress analysis with emotions and recommendations
+        Analyze one live video frame (BGR numpy array)
+        Reuses grayscale and emotion-batch buffers between calls, so use one
+        detector per video stream. Each face carries its 'location' (x, y, w, h)
+        and 'emotions'; 'latency_ms' is checked against FRAME_LATENCY_BUDGET_MS.
         """
+        start = time.perf_counter()
         try:
-            # Read image
-            img = cv2.imread(image_path)
-            if img is None:
-                raise ValueError(f"Could not read image: {image_path}")
+            height, width = frame.shape[:2]
+            if self._frame_gray is None or self._frame_gray.shape != (height, width):
+                self._frame_gray = np.empty((height, width), dtype=np.uint8)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._frame_gray)
             
-            # Detect faces
-            faces, gray = self.detect_faces(img)
+            faces, _ = self.detect_faces(frame, gray=gray)
             
-            if len(faces) == 0:
-                return {
-                    'success': False,
-                    'error': 'No faces detected in image',
-                    'faces_detected': 0
-                }
+            if self._frame_batch is None or len(self._frame_batch) < len(faces):
+                capacity = max(8, len(faces))
+                self._frame_batch = np.empty((capacity, EMOTION_INPUT_SIZE[1], EMOTION_INPUT_SIZE[0], 1), dtype=np.float32)
+            skipped = 0
+            if self.motion_gate is not None:
+                emotions_list, skipped = self.analyze_emotions_gated(
+                    frame, faces, self.motion_gate, gray=gray, out=self._frame_batch
+                )
+            else:
+                emotions_list = self.analyze_emotions_batch(frame, faces, gray=gray, out=self._frame_batch)
             
-            # Analyze each face
             face_data_list = []
             stress_scores = []
-            
-            for i, face_region in enumerate(faces):
-                # Analyze emotions
-                emotions = self.analyze_emotion_deepface(img, face_region)
-                
+            for i, (face_region, emotions) in enumerate(zip(faces, emotions_list)):
                 if emotions is None:
                     continue
-                
-                # Calculate stress
-                stress_score, stress_level, recommendations = self.analyze_stress_from_emotions(emotions)
-                stress_scores.append(stress_score)
-                
-                # Get dominant emotion
-                dominant_emotion = max(emotions, key=emotions.get)
-                
-                face_data = {
-                    'face_id': i + 1,
-                    'stress_score': round(stress_score, 2),
-                    'stress_level': stress_level,
-                    'dominant_emotion': dominant_emotion,
-                    'emotion_confidence': round(emotions[dominant_emotion], 2),
-                    'all_emotions': {emotion: round(conf, 4) for emotion, conf in emotions.items()},
-                    'recommendations': recommendations
-                }
+                face_data, stress_score = self.build_face_data(i + 1, emotions)
+                face_data['location'] = [int(v) for v in face_region]
+                face_data['emotions'] = emotions
                 face_data_list.append(face_data)
+                stress_scores.append(stress_score)
             
-            if not face_data_list:
-                return {
-                    'success': False,
-                    'error': 'Faces detected but emotion analysis failed',
-                    'faces_detected': len(faces)
-                }
-            
-            # Calculate average stress
-            average_stress = np.mean(stress_scores) if stress_scores else 0.5
-            
-            # Overall assessment
-            if average_stress < 0.20:
-                overall_level = "Very Low"
-            elif average_stress < 0.35:
-                overall_level = "Low"
-            elif average_stress < 0.50:
-                overall_level = "Moderate"
-            elif average_stress < 0.70:
-                overall_level = "High"
-            else:
-                overall_level = "Very High"
-            
-            return {
-                'success': True,
+            average_stress = float(np.mean(stress_scores)) if stress_scores else 0.0
+            overall_level = self.get_overall_stress_level(average_stress) if stress_scores else "Unknown"
+            result = {
+                'success': bool(face_data_list),
                 'faces_detected': len(face_data_list),
                 'average_stress_score': round(average_stress, 2),
+                'stress_level': overall_level,
                 'overall_stress_level': overall_level,
-                'face_data': face_data_list
+                'face_data': face_data_list,
+                'inference_skipped': skipped
             }
-            
         except Exception as e:
-            print(f"[ERROR] Facial analysis error: {e}")
+            print(f"[ERROR] Frame analysis error: {e}")
+            result = {'success': False, 'error': str(e), 'faces_detected': 0, 'face_data': []}
+        
+        latency_ms = (time.perf_counter() - start) * 1000
+        result['latency_ms'] = round(latency_ms, 1)
+        self.frame_stats['frames'] += 1
+        self.frame_stats['last_latency_ms'] = result['latency_ms']
+        if latency_ms > FRAME_LATENCY_BUDGET_MS:
+            self.frame_stats['over_budget'] += 1
+        return result
+    
+    def get_motion_gate_stats(self):
+        """Skip ratio of the process_frame motion gate"""
+        if self.motion_gate is None:
+            return {'enabled': False}
+        stats = self.motion_gate.stats()
+        stats['enabled'] = True
+        return stats
+    
+    def get_capture_gate_stats(self):
+        """Motion gate counters summed over all capture sessions, evicted ones included"""
+        if self.capture_gates is None:
+            return {'enabled': False}
+        with self._capture_gates_lock:
+            checks, skips = self._capture_gate_checks, self._capture_gate_skips
+            sessions = len(self.capture_gates)
+        return {
+            'enabled': True,
+            'sessions': sessions,
+            'checks': checks,
+            'skips': skips,
+            'skip_ratio': round(skips / checks, 4) if checks else 0.0,
+            'threshold': self.motion_threshold
+        }
+    
+    def get_facial_stress_analysis(self, image_path):
+        """
+        Main function to analyze stress from facial image file
+        Returns: comprehensive stress analysis with emotions and recommendations
+        """
+        img = cv2.imread(image_path)
+        if img is None:
             return {
                 'success': False,
-                'error': str(e)
+                'error': f"Could not read image: {image_path}"
             }
-
-
-# Global detector instance
-_detector = None
-
-def initialize_facial_detector():
-    """Initialize global facial stress detector"""
-    global _detector
-    if _detector is None:
-        _detector = FacialStressDetector()
-    return _detector
-
-def get_facial_stress_analysis(image_path):
-    """Get stress analysis for image"""
-    global _detector
-    if _detector is None:
-        _detector = initialize_facial_detector()
-    return _detector.get_facial_stress_analysis(image_path)
-
-def get_facial_stress_from_base64(base64_string):
-    """
-    Analyze facial stress from base64 encoded image
-    Useful for camera uploads from frontend
-    """
-    try:
-        global _detector
-        if _detector is None:
-            _detector = initialize_facial_detector()
+        return self.get_facial_stress_analysis_from_array(img)
+    
+    def get_facial_stress_analysis_from_bytes(self, image_bytes, capture_session=None):
+        """
+        Analyze stress from an encoded image (PNG, JPG, BMP) held in memory
+        Decodes with cv2.imdecode so uploads never touch the filesystem
+        capture_session: key of a series of camera captures (e.g. a browser session);
+                         faces that did not visibly change since that session's last
+                         capture reuse its emotions instead of running inference
+        """
+        cache_key = content_hash(image_bytes) if self.result_cache is not None and image_bytes else None
+        if cache_key and not self.perceptual_cache:
+            # Exact re-submissions are answered before decoding
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return copy.deepcopy(cached)
         
-        # Decode base64
-        if "," in base64_string:
-            base64_string = base64_string.split(",")[1]
+        with self._batching_request():
+            img = decode_image(image_bytes)
+            if img is None:
+                return {
+                    'success': False,
+                    'error': 'Could not decode image'
+                }
+            gate = self._capture_gate(capture_session)
+            if gate is None:
+                return self._analyze_with_cache(img, cache_key, lookup=self.perceptual_cache)
+            motion_gate, lock = gate
+            with lock:
+                checks, skips = motion_gate.checks, motion_gate.skips
+                try:
+                    return self._analyze_with_cache(img, cache_key, lookup=self.perceptual_cache,
+                                                    motion_gate=motion_gate)
+                finally:
+                    # Summed here, so sessions evicted from capture_gates stay counted
+                    with self._capture_gates_lock:
+                        self._capture_gate_checks += motion_gate.checks - checks
+                        self._capture_gate_skips += motion_gate.skips - skips
+    
+    def _batching_request(self):
+        """Announce a request to the micro-batcher, see EmotionBatcher.request()"""
+        return self.batcher.request() if self.batcher is not None else nullcontext()
+    
+    def _capture_gate(self, capture_session):
+        """(MotionGate, lock) of a capture session, created on its first capture; None without gating"""
+        if capture_session is None or self.capture_gates is None:
+            return None
+        with self._capture_gates_lock:
+            gate = self.capture_gates.get(capture_session)
+            if gate is None:
+                gate = (MotionGate(self.motion_threshold), threading.Lock())
+            # Stored again on every capture so the session's TTL restarts
+            self.capture_gates.put(capture_session, gate)
+        return gate
+    
+    def get_facial_stress_analysis_from_array(self, img):
+        """
+        Analyze stress from a decoded BGR image (numpy array)
+        Returns: comprehensive stress analysis with emotions and recommendations
+        """
+        with self._batching_request():
+            cache_key = content_hash(img) if self.result_cache is not None else None
+            return self._analyze_with_cache(img, cache_key)
+    
+    def _near_duplicate(self, query_hash, stored_hash):
+        return (query_hash ^ stored_hash).bit_count() <= self.perceptual_max_distance
+    
+    def _cache_lookup(self, img, cache_key, lookup=True):
+        """Returns: (cached result or None, near key to store the fresh result under)"""
+        near_key = difference_hash(img) if self.perceptual_cache else None
+        if lookup:
+            cached = self.result_cache.get(cache_key, near_key=near_key, near_match=self._near_duplicate)
+            if cached is not None:
+                return copy.deepcopy(cached), near_key
+        return None, near_key
+    
+    def _cache_store(self, cache_key, result, near_key):
+        if cache_key is not None and result.get('success'):
+            self.result_cache.put(cache_key, copy.deepcopy(result), near_key=near_key)
+    
+    def _analyze_with_cache(self, img, cache_key, lookup=True, motion_gate=None):
+        """Serve from the result cache when possible, otherwise analyze and store"""
+        if cache_key is None:
+            return self._analyze_image(img, motion_gate)
         
-        image_bytes = base64.b64decode(base64_string)
-        image = Image.open(BytesIO(image_bytes))
+        cached, near_key = self._cache_lookup(img, cache_key, lookup)
+        if cached is not None:
+            return cached
         
-        # Convert to numpy array and BGR
-        image_np = np.array(image)
-        if len(image_np.shape) == 3 and image_np.shape[2] == 4:
-            image_np = cv2.cvtColor(image_np, cv2.COLOR_RGBA2BGR)
-        elif len(image_np.shape) == 3:
-            image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
+        result = self._analyze_image(img, motion_gate)
+        self._cache_store(cache_key, result, near_key)
+        return result
+    
+    def crop_faces(self, gray, faces):
+        """48x48 grayscale (aligned, with align_faces) crops of faces, ready for analyze_face_crops"""
+        return [self._face_crop(gray, face_region, EMOTION_INPUT_SIZE, gray=gray) for face_region in faces]
+    
+    def analyze_face_crops(self, crops):
+        """
+        Emotion dicts for 48x48 face crops gathered from any number of images,
+        in one batched inference
+        """
+        if not crops:
+            return []
+        # Crops are already 48x48, so the strip's regions pass through preprocessing unchanged
+        width, height = EMOTION_INPUT_SIZE
+        strip = np.vstack(crops)
+        regions = [(0, i * height, width, height) for i in range(len(crops))]
+        return self.analyze_emotions_batch(strip, regions, align=False)
+    
+    def analyze_video(self, video_path, **options):
+        """
+        Stress timeline of a recorded video (see video_analysis.analyze_video for options)
+        Returns: dict with 'summary' and a per-second 'timeline'
+        """
+        from video_analysis import analyze_video
+        return analyze_video(self, video_path, **options)
+    
+    def analyze_images(self, images):
+        """
+        Analyze many decoded BGR images in one pass: faces are detected per image,
+        then the 48x48 crops of every face are stacked into one strip and share a
+        single batched emotion inference
+        images: list of numpy arrays (None entries get an error result)
+        Returns: list of analysis dicts in input order, shaped like
+        get_facial_stress_analysis_from_array
+        """
+        with self._batching_request():
+            return self._analyze_images(images)
+    
+    def _analyze_images(self, images):
+        results = [None] * len(images)
+        pending = []   # (index, faces, cache_key, near_key)
+        crops = []
+        
+        for index, img in enumerate(images):
+            if img is None:
+                results[index] = {'success': False, 'error': 'Could not decode image'}
+                continue
+            try:
+                cache_key = content_hash(img) if self.result_cache is not None else None
+                near_key = None
+                if cache_key is not None:
+                    cached, near_key = self._cache_lookup(img, cache_key)
+                    if cached is not None:
+                        results[index] = cached
+                        continue
+                
+                faces, gray = self.detect_faces(img)
+                if len(faces) == 0:
+                    results[index] = {'success': False, 'error': 'No faces detected in image', 'faces_detected': 0}
+                    continue
+                crops.extend(self.crop_faces(gray, faces))
+                pending.append((index, faces, cache_key, near_key))
+            except Exception as e:
+                print(f"[ERROR] Facial analysis error: {e}")
+                results[index] = {'success': False, 'error': str(e)}
         
-        # Detect faces
-        faces, _ = _detector.detect_faces(image_np)
+        if not pending:
+            return results
         
-        if len(faces) == 0:
+        try:
+            emotions_list = self.analyze_face_crops(crops)
+        except Exception as e:
+            print(f"[ERROR] Batched facial analysis error: {e}")
+            for index, _, _, _ in pending:
+                results[index] = {'success': False, 'error': str(e)}
+            return results
+        
+        offset = 0
+        for index, faces, cache_key, near_key in pending:
+            result = self._build_result(faces, emotions_list[offset:offset + len(faces)])
+            offset += len(faces)
+            self._cache_store(cache_key, result, near_key)
+            results[index] = result
+        return results
+    
+    def get_cache_stats(self):
+        """Hit/miss counters of the analysis result cache"""
+        if self.result_cache is None:
+            return {'enabled': False}
+        stats = self.result_cache.stats()
+        stats['enabled'] = True
+        stats['perceptual'] = self.perceptual_cache
+        return stats
+    
+    def _analyze_image(self, img, motion_gate=None):
+        """
+        Core analysis of a decoded BGR image: detect faces, batch emotions, score stress
+        motion_gate: MotionGate whose unchanged faces skip emotion inference
+        Returns: comprehensive stress analysis with emotions and recommendations
+        """
+        try:
+            # Detect faces
+            faces, gray = self.detect_faces(img)
+            
+            if len(faces) == 0:
+                return {
+                    'success': False,
+                    'error': 'No faces detected in image',
+                    'faces_detected': 0
+                }
+            
+            # Analyze all faces with one batched forward pass
+            if motion_gate is not None:
+                emotions_list, _ = self.analyze_emotions_gated(img, faces, motion_gate, gray=gray)
+            else:
+                emotions_list = self.analyze_emotions_batch(img, faces)
+            return self._build_result(faces, emotions_list)
+            
+        except Exception as e:
+            print(f"[ERROR] Facial analysis error: {e}")
             return {
                 'success': False,
-                'error': 'No faces detected in image',
-                'faces_detected': 0
+                'error': str(e)
             }
-        
-        # Analyze each face
+    
+    def _build_result(self, faces, emotions_list):
+        """Score every face of one image and aggregate the overall assessment"""
         face_data_list = []
         stress_scores = []
         
-        for i, face_region in enumerate(faces):
-            emotions = _detector.analyze_emotion_deepface(image_np, face_region)
-            
+        for i, emotions in enumerate(emotions_list):
             if emotions is None:
                 continue
             
-            stress_score, stress_level, recommendations = _detector.analyze_stress_from_emotions(emotions)
+            face_data, stress_score = self.build_face_data(i + 1, emotions)
             stress_scores.append(stress_score)
-            
-            dominant_emotion = max(emotions, key=emotions.get)
-            
-            face_data = {
-                'face_id': i + 1,
-                'stress_score': round(stress_score, 2),
-                'stress_level': stress_level,
-                'dominant_emotion': dominant_emotion,
-                'emotion_confidence': round(emotions[dominant_emotion], 2),
-                'all_emotions': {emotion: round(conf, 4) for emotion, conf in emotions.items()},
-                'recommendations': recommendations
-            }
             face_data_list.append(face_data)
         
         if not face_data_list:
             return {
                 'success': False,
-                'error': 'Emotion analysis failed',
+                'error': 'Faces detected but emotion analysis failed',
                 'faces_detected': len(faces)
             }
         
+        # Calculate average stress and overall assessment
         average_stress = np.mean(stress_scores)
-        
-        if average_stress < 0.20:
-            overall_level = "Very Low"
-        elif average_stress < 0.35:
-            overall_level = "Low"
-        elif average_stress < 0.50:
-            overall_level = "Moderate"
-        elif average_stress < 0.70:
-            overall_level = "High"
-        else:
-            overall_level = "Very High"
+        overall_level = self.get_overall_stress_level(average_stress)
         
         return {
             'success': True,
@@ -356,13 +1289,105 @@ def get_facial_stress_from_base64(base64_string):
             'overall_stress_level': overall_level,
             'face_data': face_data_list
         }
-        
+
+
+# Global detector instance
+_detector = None
+
+def initialize_facial_detector(warm_up=True, **detector_settings):
+    """
+    Initialize global facial stress detector and warm up the emotion model
+    detector_settings are passed to FacialStressDetector (detection_max_side,
+    scale_factor, min_neighbors, min_face_size, detector_backend, detector_options,
+    cache_size, cache_ttl, perceptual_cache, perceptual_max_distance, motion_threshold,
+    inference_workers, inference_timeout, micro_batching, batch_max_wait_ms, batch_max_size,
+    emotion_model_path, cascade_model_path, cascade_min_margin, cascade_max_entropy, align_faces)
+    """
+    global _detector
+    if _detector is None:
+        _detector = FacialStressDetector(warm_up=warm_up, **detector_settings)
+    return _detector
+
+def is_facial_detector_ready():
+    """True once the global detector has finished its warm-up"""
+    return _detector is not None and _detector.ready
+
+def get_facial_detector_status():
+    """Readiness flag and per-stage startup timings of the global detector"""
+    if _detector is None:
+        return {'ready': False, 'startup_timings': {}, 'cache': {'enabled': False}}
+    return {
+        'ready': _detector.ready,
+        'startup_timings': dict(_detector.startup_timings),
+        'emotion_model': _detector.emotion_model_path or 'deepface',
+        'align_faces': _detector.eye_locator is not None,
+        'cache': _detector.get_cache_stats(),
+        'capture_motion_gate': _detector.get_capture_gate_stats(),
+        'inference_pool': (dict(_detector.inference_pool.stats, workers=_detector.inference_pool.workers)
+                           if _detector.inference_pool is not None else {'workers': 0}),
+        'micro_batching': _detector.batcher.stats() if _detector.batcher is not None else {'enabled': False},
+        'cascade': _detector.get_cascade_stats()
+    }
+
+def get_facial_stress_analysis(image_path):
+    """Get stress analysis for image"""
+    global _detector
+    if _detector is None:
+        _detector = initialize_facial_detector()
+    return _detector.get_facial_stress_analysis(image_path)
+
+def get_facial_stress_analysis_from_bytes(image_bytes, capture_session=None):
+    """Get stress analysis for an encoded image held in memory (e.g. an upload stream)"""
+    global _detector
+    if _detector is None:
+        _detector = initialize_facial_detector()
+    return _detector.get_facial_stress_analysis_from_bytes(image_bytes, capture_session=capture_session)
+
+def get_facial_stress_analysis_from_array(image):
+    """Get stress analysis for a decoded BGR image array"""
+    global _detector
+    if _detector is None:
+        _detector = initialize_facial_detector()
+    return _detector.get_facial_stress_analysis_from_array(image)
+
+def get_facial_stress_from_base64(base64_string):
+    """
+    Analyze facial stress from base64 encoded image
+    Useful for camera uploads from frontend
+    """
+    try:
+        # Strip a data URL prefix ("data:image/png;base64,...")
+        if "," in base64_string:
+            base64_string = base64_string.split(",")[1]
+        image_bytes = base64.b64decode(base64_string)
     except Exception as e:
         print(f"[ERROR] Base64 analysis error: {e}")
         return {
             'success': False,
             'error': str(e)
         }
+    return get_facial_stress_analysis_from_bytes(image_bytes)
+
+def get_video_stress_analysis(video_path, **options):
+    """Per-second stress timeline and summary of a video file (see video_analysis.analyze_video)"""
+    global _detector
+    if _detector is None:
+        _detector = initialize_facial_detector()
+    return _detector.analyze_video(video_path, **options)
+
+def analyze_images(images):
+    """
+    Analyze a list of decoded BGR images with shared batched emotion inference
+    Returns: list of analysis dicts in input order
+    """
+    global _detector
+    if _detector is None:
+        _detector = initialize_facial_detector()
+    return _detector.analyze_images(images)
+
+def analyze_images_from_bytes(images_bytes):
+    """Decode a list of encoded images (e.g. multipart uploads) and analyze them together"""
+    return analyze_images([decode_image(image_bytes) for image_bytes in images_bytes])
 
 def combine_multimodal_predictions(facial_stress, physiological_stress, text_stress):
     """
@@ -386,21 +1411,9 @@ def combine_multimodal_predictions(facial_stress, physiological_stress, text_str
             weights['text'] * text_score
         )
         
-        # Determine combined stress level
-        if combined_score < 0.20:
-            stress_level = "Very Low"
-        elif combined_score < 0.35:
-            stress_level = "Low"
-        elif combined_score < 0.50:
-            stress_level = "Moderate"
-        elif combined_score < 0.70:
-            stress_level = "High"
-        else:
-            stress_level = "Very High"
-        
         return {
             'combined_score': round(combined_score, 2),
-            'stress_level': stress_level,
+            'stress_level': stress_level_name(combined_score),
             'facial_contribution': f"{weights['facial']*100:.0f}%",
             'physiological_contribution': f"{weights['physiological']*100:.0f}%",
             'text_contribution': f"{weights['text']*100:.0f}%"
@@ -0,0 +1,86 @@
+"""
+Gunicorn settings, read automatically from the working directory
+Worker count comes from -w/--workers or WEB_CONCURRENCY; each worker sizes
+its TensorFlow, OpenCV and BLAS thread pools to its share of the cores
+(runtime_config.py)
+RUNTIME_PIN_CORES=1 additionally pins every worker to its own cores
+
+FACIAL_MICRO_BATCHING=1 switches to gthread workers with GUNICORN_THREADS
+(default 4) threads each, so concurrent requests can share emotion batches.
+
+GUNICORN_TIMEOUT (seconds, default 120) must cover the slowest request:
+/api/video_stress analyzes the whole upload inside the request and refuses
+videos longer than MAX_VIDEO_SECONDS (app.py, default 300 s of video, about a
+minute of CPU at the usual 5-10x real time). Raise both together, or analyze
+long recordings with video_analysis.py.
+
+GUNICORN_PRELOAD=1 imports the app once in the master: the text model and
+vectorizer are unpickled there and shared with the workers copy-on-write.
+The master freezes its objects out of the garbage collector before forking so
+collections in the workers do not write to (and copy) the shared pages.
+TensorFlow and thread pools are started per worker in post_fork.
+Check the sharing with `python worker_memory.py`.
+"""
+
+import gc
+import os
+import itertools
+
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', '0') == '1'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+
+# FACIAL_MICRO_BATCHING merges emotion inference of requests served at the same
+# time by one process, which sync workers never do: use threaded workers then
+threads = int(os.getenv('GUNICORN_THREADS', '4' if os.getenv('FACIAL_MICRO_BATCHING') == '1' else '1'))
+if threads > 1:
+    worker_class = 'gthread'
+
+
+def when_ready(server):
+    if preload_app:
+        # Runs in the master after the app is loaded and before any worker is forked
+        gc.collect()
+        gc.freeze()
+        server.log.info("Preloaded app; %d objects frozen for copy-on-write sharing", gc.get_freeze_count())
+
+
+# Core slot of every live worker, kept in the master. A respawned worker takes the
+# lowest free slot, so no two live workers are pinned to the same cores
+_pin_slots = {}
+
+
+def pre_fork(server, worker):
+    if os.getenv('RUNTIME_PIN_CORES') != '1':
+        return
+    # Forget workers that are gone without a child_exit (e.g. a failed fork)
+    for other in [other for other in _pin_slots if other.pid not in server.WORKERS]:
+        del _pin_slots[other]
+    taken = set(_pin_slots.values())
+    worker.pin_slot = next(slot for slot in itertools.count() if slot not in taken)
+    _pin_slots[worker] = worker.pin_slot
+
+
+def child_exit(server, worker):
+    _pin_slots.pop(worker, None)
+
+
+def post_fork(server, worker):
+    from runtime_config import configure_runtime
+
+    # The running worker count: -w on the command line overrides this file's workers
+    workers = server.cfg.workers
+    # app.py's own configure_runtime() reads the worker count from here
+    os.environ['WEB_CONCURRENCY'] = str(workers)
+    # Slot k is pinned to the k-th block of per-worker cores (wrapping around)
+    runtime = configure_runtime(workers=workers, pin_worker=getattr(worker, 'pin_slot', None))
+    if runtime['pinned_cores']:
+        server.log.info("Worker %s pinned to cores %s (slot %d, %d workers configured)",
+                        worker.pid, runtime['pinned_cores'], worker.pin_slot, workers)
+
+    if preload_app:
+        # Only thread and TensorFlow state is per worker; everything else came from the master
+        import app
+        app.start_facial_stack()
@@ -0,0 +1,65 @@
+"""
+Import-time report for app.py
+Imports the app in a fresh interpreter with `python -X importtime` for each
+FACIAL_LOAD_MODE and reports wall time, peak RSS and the slowest top-level
+packages, so the cost of the facial stack at worker boot is visible
+
+Usage: python import_time_report.py [modes, default eager,lazy] [top_n]
+"""
+
+import os
+import re
+import sys
+import subprocess
+from collections import defaultdict
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+# Child reports wall time (s) and peak RSS (KB) of importing the app on its last stdout line
+CHILD_SCRIPT = (
+    "import time, resource; start = time.perf_counter(); import app; "
+    "print(round(time.perf_counter() - start, 2), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+def profile_import(mode):
+    """Returns: (wall seconds, peak RSS MB, {top-level package: cumulative ms}) or None on failure"""
+    env = dict(os.environ, FACIAL_LOAD_MODE=mode)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        print(f"[ERROR] Importing app with FACIAL_LOAD_MODE={mode} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+        return None
+
+    packages = defaultdict(float)
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # One nesting level below 'app' = imported while app.py runs, including
+        # anything it loads at boot (e.g. the facial stack in eager mode)
+        if match and len(match.group(3)) == 3:
+            packages[match.group(4).split('.')[0]] += int(match.group(2)) / 1000.0
+
+    wall, rss_kb = proc.stdout.strip().splitlines()[-1].split()
+    return float(wall), int(rss_kb) / 1024.0, packages
+
+
+def main():
+    modes = sys.argv[1].split(',') if len(sys.argv) > 1 else ['eager', 'lazy']
+    top_n = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+
+    for mode in modes:
+        result = profile_import(mode)
+        if result is None:
+            continue
+        wall, rss_mb, packages = result
+        print("\n" + "=" * 60)
+        print(f"FACIAL_LOAD_MODE={mode}: import app {wall:.2f}s (includes boot-time model loading), "
+              f"peak RSS {rss_mb:.0f} MB")
+        print("-" * 60)
+        print(f"{'Package':<32} {'Cumulative import (ms)':>24}")
+        for package, ms in sorted(packages.items(), key=lambda item: -item[1])[:top_n]:
+            print(f"{package:<32} {ms:>24.1f}")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
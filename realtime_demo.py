@@ -7,14 +7,17 @@ import cv2
 import numpy as np
 import sys
 import os
-from facial_stress_detection import FacialStressDetector
+from facial_stress_detection import FacialStressDetector, LIVE_DETECTION_SETTINGS
+from face_tracking import FaceTracker
 
 print("[OK] Real-time Facial Stress Detection Demo")
 print("[INFO] Press 'q' to quit, 's' to save analysis\n")
 
 try:
-    # Initialize detector
-    detector = FacialStressDetector()
+    # Initialize detector with live-video detection settings and a warm emotion model
+    detector = FacialStressDetector(warm_up=True, **LIVE_DETECTION_SETTINGS)
+    # Track faces between detections so overlays update on every frame
+    tracker = FaceTracker(detector)
     
     # Open camera
     cap = cv2.VideoCapture(0)
@@ -35,43 +38,43 @@ try:
         
         frame_count += 1
         
-        # Analyze frame every 5 frames to reduce CPU usage
-        if frame_count % 5 == 0:
-            results = detector.process_frame(frame)
-            
-            # Draw results on frame
-            if results.get('faces_detected', 0) > 0:
-                # Draw face rectangles and stress info
-                for i, face_data in enumerate(results.get('face_data', [])):
-                    # Get face location
-                    location = face_data.get('location', [])
-                    if len(location) == 4:
-                        x, y, w, h = location
-                        
-                        # Draw rectangle
-                        stress_score = face_data.get('stress_score', 0)
-                        color = (0, 255, 0) if stress_score < 0.4 else (0, 255, 255) if stress_score < 0.7 else (0, 0, 255)
-                        
-                        cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-                        
-                        # Put text
-                        stress_level = face_data.get('stress_level', 'Unknown')
-                        text = f"{stress_level} ({stress_score*100:.0f}%)"
-                        cv2.putText(frame, text, (x, y-10), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
-            else:
-                cv2.putText(frame, "No faces detected", (30, 30),
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            
-            # Show overall stress
-            avg_stress = results.get('average_stress_score', 0)
-            overall_level = results.get('stress_level', 'Unknown')
-            cv2.putText(frame, f"Overall: {overall_level} ({avg_stress*100:.0f}%)", 
-                      (10, frame.shape[0] - 10),
-                      cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        # Tracker runs detection and emotion inference at their own cadence
+        results = tracker.update(frame)
+        display = frame.copy()
+        
+        # Draw results on a copy so saved analyses use the clean frame
+        if results.get('faces_detected', 0) > 0:
+            # Draw face rectangles and stress info
+            for i, face_data in enumerate(results.get('face_data', [])):
+                # Get face location
+                location = face_data.get('location', [])
+                if len(location) == 4:
+                    x, y, w, h = location
+                    
+                    # Draw rectangle
+                    stress_score = face_data.get('stress_score', 0)
+                    color = (0, 255, 0) if stress_score < 0.4 else (0, 255, 255) if stress_score < 0.7 else (0, 0, 255)
+                    
+                    cv2.rectangle(display, (x, y), (x+w, y+h), color, 2)
+                    
+                    # Put text
+                    stress_level = face_data.get('stress_level', 'Unknown')
+                    text = f"#{face_data.get('track_id', i + 1)} {stress_level} ({stress_score*100:.0f}%)"
+                    cv2.putText(display, text, (x, y-10), 
+                              cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+        else:
+            cv2.putText(display, "No faces detected", (30, 30),
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        
+        # Show overall stress
+        avg_stress = results.get('average_stress_score', 0)
+        overall_level = results.get('stress_level', 'Unknown')
+        cv2.putText(display, f"Overall: {overall_level} ({avg_stress*100:.0f}%)", 
+                  (10, display.shape[0] - 10),
+                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
         # Show frame
-        cv2.imshow("Facial Stress Detection", frame)
+        cv2.imshow("Facial Stress Detection", display)
         
         # Check for key press
         key = cv2.waitKey(1) & 0xFF
@@ -99,6 +102,13 @@ try:
     
     cap.release()
     cv2.destroyAllWindows()
+    stats = tracker.stats
+    print(f"[INFO] Tracked {stats['frames']} frames with {stats['detections']} detection passes "
+          f"and {stats['emotion_inferences']} per-face emotion inferences")
+    if tracker.motion_gate is not None:
+        gate = tracker.motion_gate.stats()
+        print(f"[INFO] Motion gate skipped {gate['skips']}/{gate['checks']} emotion inferences "
+              f"(skip ratio {gate['skip_ratio']:.0%}, threshold {gate['threshold']})")
     print("[OK] Demo completed")
     
 except Exception as e:
@@ -0,0 +1,112 @@
+"""
+Bounded LRU result cache with TTL expiry and hit/miss counters
+Thread-safe, so one instance can be shared by concurrent Flask requests
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _CacheEntry:
+    __slots__ = ('value', 'near_key', 'expires_at')
+
+    def __init__(self, value, near_key, expires_at):
+        self.value = value
+        self.near_key = near_key
+        self.expires_at = expires_at
+
+
+class TTLLRUCache:
+    """
+    Least-recently-used cache holding at most max_entries values, each valid
+    for ttl_seconds (None = no expiry)
+
+    Entries may carry an optional near_key; get() can then fall back to the
+    most recent entry whose near_key satisfies near_match(query, stored), which
+    is how near-duplicate lookups (e.g. perceptual image hashes) are served.
+    """
+
+    def __init__(self, max_entries=128, ttl_seconds=300.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, entry, now):
+        return entry.expires_at is not None and entry.expires_at <= now
+
+    def _purge_expired(self, now):
+        for key in [k for k, entry in self._entries.items() if self._expired(entry, now)]:
+            del self._entries[key]
+            self.expirations += 1
+
+    def get(self, key, near_key=None, near_match=None):
+        """Return the cached value for key (or a near match), or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None and near_key is not None and near_match is not None:
+                for stored_key in reversed(self._entries):
+                    candidate = self._entries[stored_key]
+                    if candidate.near_key is None or self._expired(candidate, now):
+                        continue
+                    if near_match(near_key, candidate.near_key):
+                        key, entry = stored_key, candidate
+                        self.near_hits += 1
+                        break
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(self, key, value, near_key=None):
+        """Store value under key, evicting expired then least-recently-used entries"""
+        now = time.monotonic()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._entries:
+                del self._entries[key]
+            elif len(self._entries) >= self.max_entries:
+                self._purge_expired(now)
+                while len(self._entries) >= self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            self._entries[key] = _CacheEntry(value, near_key, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'near_hits': self.near_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
@@ -0,0 +1,101 @@
+"""
+CPU Thread Configuration
+Sizes the thread pools of TensorFlow, OpenCV, onnxruntime/TFLite and the BLAS
+libraries for one worker process, so N gunicorn workers share the machine's
+cores instead of each starting a pool as large as the whole machine.
+
+configure_runtime() must run before NumPy, OpenCV or TensorFlow are imported
+(BLAS and TensorFlow read their thread settings at import/initialisation);
+app.py calls it first thing. Settings already present in the environment win.
+
+Environment:
+  WEB_CONCURRENCY             gunicorn worker count (default 1)
+  RUNTIME_THREADS_PER_WORKER  threads per worker (default: cores // workers)
+  RUNTIME_PIN_CORES=1         pin each gunicorn worker to its own cores (Linux)
+"""
+
+import os
+import sys
+
+BLAS_THREAD_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                    'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+# Settings applied in this process (None until configure_runtime runs)
+_runtime = None
+# Environment values configure_runtime set itself; a later call may replace them
+_runtime_env = {}
+
+
+def available_cores():
+    """Cores this process may run on (respects cgroup/taskset affinity)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def configured_threads():
+    """Threads per inference library for this process, or None when not configured"""
+    return _runtime['threads'] if _runtime else None
+
+
+def configure_runtime(workers=None, threads=None, pin_worker=None):
+    """
+    Size library thread pools for one of `workers` processes on this machine
+    threads: threads per library (default RUNTIME_THREADS_PER_WORKER, else cores // workers)
+    pin_worker: index of this worker; pins it to its own slice of the cores
+    Returns: dict with the applied settings
+    """
+    global _runtime
+    # Called again with another worker count (gunicorn's post_fork after a preloaded
+    # app configured the master from WEB_CONCURRENCY): size the pools again
+    if _runtime is not None and pin_worker is None and workers in (None, _runtime['workers']):
+        return _runtime
+
+    # Pinning narrows the affinity mask, so later calls keep partitioning the original cores
+    cores = _runtime['cores'] if _runtime else available_cores()
+    if workers is None:
+        workers = _runtime['workers'] if _runtime else int(os.getenv('WEB_CONCURRENCY', '1'))
+    workers = max(1, workers)
+    if threads is None:
+        threads = int(os.getenv('RUNTIME_THREADS_PER_WORKER', '0')) or len(cores) // workers
+    threads = max(1, threads)
+    inter_op = 1 if threads <= 2 else 2
+
+    env = {var: str(threads) for var in BLAS_THREAD_VARS}
+    env['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    env['TF_NUM_INTEROP_THREADS'] = str(inter_op)
+    # Read by OpenCV when it is imported, so configuring does not import it
+    env['OPENCV_FOR_THREADS_NUM'] = str(threads)
+    for var, value in env.items():
+        if var not in os.environ or os.environ[var] == _runtime_env.get(var):
+            os.environ[var] = value
+            _runtime_env[var] = value
+
+    pinned = None
+    if pin_worker is not None and hasattr(os, 'sched_setaffinity'):
+        first = (pin_worker * threads) % len(cores)
+        pinned = [cores[(first + i) % len(cores)] for i in range(min(threads, len(cores)))]
+        os.sched_setaffinity(0, pinned)
+
+    if 'cv2' in sys.modules:
+        sys.modules['cv2'].setNumThreads(threads)
+
+    if 'tensorflow' in sys.modules:
+        # Already imported (e.g. preloaded): set it directly if TF has not initialised yet
+        import tensorflow as tf
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+        except RuntimeError:
+            print("[WARNING] TensorFlow already initialised, its thread pools keep their size")
+
+    _runtime = {
+        'workers': workers,
+        'cores': cores,
+        'threads': threads,
+        'inter_op_threads': inter_op,
+        'pinned_cores': pinned
+    }
+    print(f"[OK] Runtime threads: {threads} per library, {workers} worker(s) on {len(cores)} core(s)"
+          + (f", pinned to {pinned}" if pinned else ""))
+    return _runtime
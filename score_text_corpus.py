@@ -0,0 +1,305 @@
+"""
+Bulk Text Stress Scoring
+Scores a large CSV or JSONL export offline with the same text model files the
+app loads (stresslevel_text_model.pkl / stresslevel_text_vectorizer.pkl).
+
+The input is streamed in fixed-size chunks and the chunks are scored by a
+process pool whose workers load the model once. At most 2 chunks per worker
+are in flight, and results are written in input order as they finish, so
+memory stays bounded whatever the input size. Output is a CSV file or a
+directory of Parquet part files (one per chunk; needs pyarrow). Every input
+column except the text is kept, plus the input row number and the
+stress_prediction, stress_label and stress_probability columns.
+
+After every written chunk a checkpoint (<output>.checkpoint.json) is replaced
+atomically. Running the same command again resumes after the last
+checkpointed chunk; output written past it is discarded first. A checkpoint
+is refused when the input file, the model files or the settings changed.
+--restart ignores the checkpoint.
+
+Input is read as UTF-8; --encoding=ISO-8859-1 reads the Latin-1 dreaddit
+training corpus.
+
+Usage: python score_text_corpus.py <input.csv|.jsonl> <output.csv|.parquet>
+                                   [text_column] [chunk_rows] [workers] [--encoding=NAME] [--restart]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from runtime_config import available_cores
+from text_ann import ann_path_for
+from text_stress import (TEXT_MODEL_PATH, TEXT_VECTORIZER_PATH, artifact_signature, load_text_scorer,
+                         stress_label_name)
+
+DEFAULT_TEXT_COLUMN = 'text'
+DEFAULT_CHUNK_ROWS = 10000
+DEFAULT_ENCODING = 'utf-8'
+RESULT_COLUMNS = ['row', 'stress_prediction', 'stress_label', 'stress_probability']
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+PROGRESS_EVERY_CHUNKS = 10
+
+
+# --- Worker processes ---
+_worker_scorer = None
+
+def _score_worker_init():
+    """Load the text model once per pool process"""
+    global _worker_scorer
+    # Offline run: one model for the whole corpus, no file watching
+    _worker_scorer = load_text_scorer(artifact_check_seconds=float('inf'))
+    if _worker_scorer is None:
+        raise RuntimeError("Text model files could not be loaded")
+
+def _score_chunk(texts):
+    """Returns: (predictions, stress probabilities) for one chunk; empty texts get None/NaN"""
+    predictions = [None] * len(texts)
+    probabilities = np.full(len(texts), np.nan)
+    positions = [i for i, text in enumerate(texts) if text.strip()]
+    if positions:
+        scored = _worker_scorer.score_texts([texts[i] for i in positions])
+        for i, result in zip(positions, scored):
+            predictions[i] = result['prediction']
+            probabilities[i] = result['stress_probability']
+    return predictions, probabilities
+
+
+# --- Input ---
+def input_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.csv':
+        return 'csv'
+    raise ValueError(f"Unsupported input file '{path}': use .csv or .jsonl")
+
+def read_chunks(path, chunk_rows, encoding=DEFAULT_ENCODING):
+    """DataFrame chunks of chunk_rows rows (the last may be shorter)"""
+    if input_format(path) == 'jsonl':
+        return pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False, encoding=encoding)
+    return pd.read_csv(path, chunksize=chunk_rows, encoding=encoding)
+
+
+# --- Output ---
+class CsvOutput:
+    """One CSV file; resuming truncates it to the checkpointed size"""
+
+    def __init__(self, path, resume_bytes=None):
+        self.path = path
+        self.file = open(path, 'r+b' if resume_bytes is not None else 'wb')
+        if resume_bytes is not None:
+            self.file.truncate(resume_bytes)
+            self.file.seek(resume_bytes)
+        self.header = resume_bytes is None or resume_bytes == 0
+
+    def write(self, frame, chunk_index):
+        self.file.write(frame.to_csv(index=False, header=self.header).encode('utf-8'))
+        self.header = False
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def position(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetOutput:
+    """Directory of part-NNNNN.parquet files; resuming removes parts past the checkpoint"""
+
+    def __init__(self, path, resume_chunks=None):
+        self.path = path
+        if resume_chunks is None and os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith('part-') and int(name[5:10]) >= (resume_chunks or 0):
+                os.remove(os.path.join(path, name))
+
+    def write(self, frame, chunk_index):
+        part = os.path.join(self.path, f'part-{chunk_index:05d}.parquet')
+        frame.to_parquet(part + '.tmp', index=False)
+        os.replace(part + '.tmp', part)
+
+    def position(self):
+        return None
+
+    def close(self):
+        pass
+
+
+# --- Checkpoint ---
+def checkpoint_path_for(output_path):
+    return output_path.rstrip('/') + '.checkpoint.json'
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint to a temporary file, then atomically replace the old one"""
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+def load_checkpoint(path, settings):
+    """The checkpoint of an earlier run with the same settings, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    for key, value in settings.items():
+        if checkpoint.get(key) != value:
+            raise ValueError(f"Checkpoint {path} belongs to a different run ({key} changed). "
+                             f"Use --restart to start over.")
+    return checkpoint
+
+
+def result_frame(chunk, text_column, first_row, predictions, probabilities):
+    """Input columns without the text, plus the RESULT_COLUMNS"""
+    scores = pd.DataFrame({
+        # object dtype: a None for empty texts must not turn integer labels into floats
+        'stress_prediction': pd.Series(predictions, index=chunk.index, dtype=object),
+        'stress_label': [stress_label_name(p) if p is not None else None for p in predictions],
+        'stress_probability': probabilities
+    }, index=chunk.index)
+    rows = pd.DataFrame({'row': np.arange(first_row, first_row + len(chunk))}, index=chunk.index)
+    # One concat instead of column inserts: exports can have a hundred columns
+    return pd.concat([rows, chunk.drop(columns=[text_column]), scores], axis=1)
+
+
+def score_corpus(input_path, output_path, text_column=DEFAULT_TEXT_COLUMN, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 workers=None, restart=False, encoding=DEFAULT_ENCODING):
+    """
+    Stream input_path through the text model into output_path
+    Returns: dict with 'success', rows/chunks scored and timing, or 'error'
+    """
+    workers = workers or len(available_cores())
+    output_format = 'parquet' if output_path.rstrip('/').endswith('.parquet') else 'csv'
+    if output_format == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return {'success': False, 'error': "Parquet output needs pyarrow: pip install pyarrow"}
+
+    settings = {
+        'input': os.path.abspath(input_path),
+        # A rewritten or appended input would resume into different rows
+        'input_file': list(artifact_signature((input_path,))[0][1:]),
+        'encoding': encoding,
+        'output': os.path.abspath(output_path),
+        'output_format': output_format,
+        'text_column': text_column,
+        'chunk_rows': chunk_rows,
+        # Resuming with other model files would mix two models in one output
+        'model_files': [list(entry) for entry in artifact_signature(
+            (TEXT_MODEL_PATH, TEXT_VECTORIZER_PATH, ann_path_for(TEXT_MODEL_PATH)))]
+    }
+    checkpoint_path = checkpoint_path_for(output_path)
+    try:
+        input_format(input_path)
+        checkpoint = None if restart else load_checkpoint(checkpoint_path, settings)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+    if checkpoint is None and os.path.exists(checkpoint_path):
+        # The output is about to be rewritten from the start
+        os.remove(checkpoint_path)
+
+    chunks_done = checkpoint['chunks_done'] if checkpoint else 0
+    rows_done = checkpoint['rows_done'] if checkpoint else 0
+    if checkpoint:
+        print(f"[INFO] Resuming after chunk {chunks_done} ({rows_done:,} rows already scored)")
+        output = (CsvOutput(output_path, checkpoint['output_bytes']) if output_format == 'csv'
+                  else ParquetOutput(output_path, chunks_done))
+    else:
+        output = CsvOutput(output_path) if output_format == 'csv' else ParquetOutput(output_path)
+
+    start = time.perf_counter()
+    rows_this_run = 0
+    pending = deque()   # (chunk index, first row, chunk, future) in input order
+
+    def write_oldest():
+        nonlocal chunks_done, rows_done, rows_this_run
+        chunk_index, first_row, chunk, future = pending.popleft()
+        predictions, probabilities = future.result()
+        output.write(result_frame(chunk, text_column, first_row, predictions, probabilities), chunk_index)
+        chunks_done, rows_done = chunk_index + 1, first_row + len(chunk)
+        rows_this_run += len(chunk)
+        save_checkpoint(checkpoint_path, dict(settings, chunks_done=chunks_done, rows_done=rows_done,
+                                              output_bytes=output.position()))
+        if chunks_done % PROGRESS_EVERY_CHUNKS == 0:
+            elapsed = time.perf_counter() - start
+            print(f"[INFO] {rows_done:,} rows scored ({rows_this_run / elapsed:,.0f} rows/s)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_score_worker_init) as pool:
+            first_row = 0
+            for chunk_index, chunk in enumerate(read_chunks(input_path, chunk_rows, encoding)):
+                if chunk_index < chunks_done:
+                    # Scored in an earlier run: parsed to advance the reader, not scored again
+                    first_row += len(chunk)
+                    continue
+                if text_column not in chunk.columns:
+                    raise ValueError(f"Column '{text_column}' not found in {input_path}")
+                clashes = [column for column in RESULT_COLUMNS if column in chunk.columns]
+                if clashes:
+                    raise ValueError(f"Input already has result column(s) {clashes}: rename them first")
+                texts = chunk[text_column].fillna('').astype(str).tolist()
+                pending.append((chunk_index, first_row, chunk, pool.submit(_score_chunk, texts)))
+                first_row += len(chunk)
+                # Bounded memory: wait for the oldest chunk before reading further
+                while len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                    write_oldest()
+            while pending:
+                write_oldest()
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'rows_scored': rows_done, 'resume_from_chunk': chunks_done}
+    finally:
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'success': True,
+        'rows_scored': rows_done,
+        'rows_this_run': rows_this_run,
+        'chunks': chunks_done,
+        'workers': workers,
+        'seconds': round(elapsed, 1),
+        'rows_per_second': round(rows_this_run / elapsed, 1) if elapsed > 0 else 0.0,
+        'output': output_path,
+        'checkpoint': checkpoint_path
+    }
+
+
+def main():
+    restart = '--restart' in sys.argv
+    encoding = DEFAULT_ENCODING
+    for arg in sys.argv[1:]:
+        if arg.startswith('--encoding='):
+            encoding = arg.split('=', 1)[1]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+    result = score_corpus(
+        args[0], args[1],
+        text_column=args[2] if len(args) > 2 else DEFAULT_TEXT_COLUMN,
+        chunk_rows=int(args[3]) if len(args) > 3 else DEFAULT_CHUNK_ROWS,
+        workers=int(args[4]) if len(args) > 4 else None,
+        restart=restart,
+        encoding=encoding
+    )
+    if not result['success']:
+        print(f"[ERROR] {result['error']}")
+        sys.exit(1)
+    print(f"[OK] {result['rows_scored']:,} rows scored into {result['output']} "
+          f"({result['rows_per_second']:,.0f} rows/s with {result['workers']} worker(s))")
+
+
+if __name__ == '__main__':
+    main()
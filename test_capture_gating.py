@@ -0,0 +1,72 @@
+"""
+Test motion gating of single camera captures: captures of one session whose
+faces did not visibly change reuse the previous emotions
+"""
+
+import cv2
+import numpy as np
+from facial_stress_detection import FacialStressDetector
+
+FACE = (100, 60, 120, 120)
+EMOTIONS = {'angry': 0.05, 'disgust': 0.0, 'fear': 0.05, 'happy': 0.1, 'neutral': 0.6, 'sad': 0.15, 'surprise': 0.05}
+
+
+def build_detector():
+    """Detector with fixed face detection and a counting emotion model"""
+    detector = FacialStressDetector(cache_size=0)
+    inferred = []
+    detector.detect_faces = lambda img, gray=None: ([FACE], cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+
+    def analyze_emotions_batch(img, faces, gray=None, out=None):
+        inferred.append(len(faces))
+        return [dict(EMOTIONS) for _ in faces]
+    detector.analyze_emotions_batch = analyze_emotions_batch
+    return detector, inferred
+
+
+def capture(brightness, noise_seed):
+    image = np.full((240, 320, 3), 90, np.uint8)
+    cv2.circle(image, (160, 120), 50, (brightness,) * 3, -1)
+    noise = np.random.default_rng(noise_seed).integers(0, 3, image.shape, dtype=np.uint8)
+    return cv2.imencode('.jpg', cv2.add(image, noise))[1].tobytes()
+
+
+def test_unchanged_capture_skips_inference():
+    """A second, nearly identical capture of the same session is not re-analyzed"""
+    detector, inferred = build_detector()
+    first = detector.get_facial_stress_analysis_from_bytes(capture(200, 1), capture_session='browser-1')
+    second = detector.get_facial_stress_analysis_from_bytes(capture(200, 2), capture_session='browser-1')
+    assert first['success'] and second['success']
+    assert second['average_stress_score'] == first['average_stress_score']
+    assert inferred == [1]
+
+
+def test_changed_face_or_other_session_runs_inference():
+    """A visibly changed face, another session or no session all run inference"""
+    detector, inferred = build_detector()
+    detector.get_facial_stress_analysis_from_bytes(capture(200, 1), capture_session='browser-1')
+    detector.get_facial_stress_analysis_from_bytes(capture(40, 2), capture_session='browser-1')
+    detector.get_facial_stress_analysis_from_bytes(capture(40, 3), capture_session='browser-2')
+    detector.get_facial_stress_analysis_from_bytes(capture(40, 4))
+    assert inferred == [1, 1, 1, 1]
+
+
+def test_capture_gate_stats_include_evicted_sessions():
+    """Skips are summed over all capture sessions, also after a session is evicted"""
+    detector, inferred = build_detector()
+    detector.get_facial_stress_analysis_from_bytes(capture(200, 1), capture_session='browser-1')
+    detector.get_facial_stress_analysis_from_bytes(capture(200, 2), capture_session='browser-1')
+    detector.get_facial_stress_analysis_from_bytes(capture(40, 3), capture_session='browser-2')
+    detector.capture_gates.clear()
+    stats = detector.get_capture_gate_stats()
+    assert stats['enabled'] and stats['sessions'] == 0
+    assert stats['checks'] == 3 and stats['skips'] == 1
+    assert stats['skip_ratio'] == round(1 / 3, 4)
+    assert stats['threshold'] == detector.motion_threshold
+
+
+if __name__ == '__main__':
+    for test in (test_unchanged_capture_skips_inference, test_changed_face_or_other_session_runs_inference,
+                 test_capture_gate_stats_include_evicted_sessions):
+        test()
+        print(f"[PASS] {test.__name__}")
@@ -0,0 +1,91 @@
+"""
+Test that the DeepFace emotion network is unwrapped into a model callable on
+(N, 48, 48, 1) batches, for the pinned deepface and its later client API
+"""
+
+import numpy as np
+import pytest
+import facial_stress_detection
+from facial_stress_detection import FacialStressDetector, build_deepface_emotion_model
+
+
+class KerasLikeModel:
+    """Stand-in for the Keras network: callable on a batch, with predict_on_batch"""
+
+    def __call__(self, batch, training=False):
+        return np.full((len(batch), 7), 1 / 7, np.float32)
+
+    def predict_on_batch(self, batch):
+        return self(batch)
+
+
+class EmotionClient:
+    """deepface >= 0.0.80 shape: a wrapper that is not callable itself"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def _predict_internal(self, batch):
+        predictions = np.full((len(batch), 7), 1 / 7, np.float32)
+        # Like deepface, a single image comes back as one (7,) row
+        return predictions[0] if len(batch) == 1 else predictions
+
+
+def with_build_model(build_model, test):
+    """Run test with facial_stress_detection's DeepFace API replaced by one exposing build_model"""
+    original = facial_stress_detection.DeepFace
+    facial_stress_detection.DeepFace = type('DeepFaceAPI', (), {'build_model': staticmethod(build_model)})
+    try:
+        test()
+    finally:
+        facial_stress_detection.DeepFace = original
+
+
+def check_warm_up_and_predict():
+    detector = FacialStressDetector()
+    assert detector.warm_up()
+    predictions = detector._predict_emotion_tensor(np.zeros((3, 48, 48, 1), np.float32))
+    assert predictions.shape == (3, 7)
+
+
+def test_client_wrapper_is_unwrapped():
+    """deepface 0.0.80-0.0.92: build_model('Emotion') returns a client holding the Keras model"""
+    keras_model = KerasLikeModel()
+
+    def unwrapped():
+        assert build_deepface_emotion_model() is keras_model
+        check_warm_up_and_predict()
+    with_build_model(lambda model_name: EmotionClient(keras_model), unwrapped)
+
+
+def test_task_argument_and_non_keras_backend():
+    """deepface >= 0.0.93 needs task=; ONNX/PyTorch clients run through their batch path"""
+    def build_model(model_name, task='facial_recognition'):
+        assert (model_name, task) == ('Emotion', 'facial_attribute')
+        return EmotionClient(model=object())
+    with_build_model(build_model, check_warm_up_and_predict)
+
+
+def test_unsupported_client_is_refused():
+    """A client with neither a Keras model nor a batch predict fails with a clear error"""
+    def build_model(model_name, task='facial_recognition'):
+        return type('EmotionClient', (), {'model': object()})()
+
+    def refused():
+        with pytest.raises(RuntimeError, match='Unsupported DeepFace version'):
+            build_deepface_emotion_model()
+    with_build_model(build_model, refused)
+
+
+def test_pinned_deepface_emotion_model():
+    """The pinned deepface (needs TensorFlow and the emotion weights) warms up and predicts batches"""
+    pytest.importorskip('deepface')
+    pytest.importorskip('tensorflow')
+    check_warm_up_and_predict()
+
+
+if __name__ == '__main__':
+    for test in (test_client_wrapper_is_unwrapped, test_task_argument_and_non_keras_backend,
+                 test_unsupported_client_is_refused, test_pinned_deepface_emotion_model):
+        test()
+        print(f"[PASS] {test.__name__}")
@@ -0,0 +1,91 @@
+"""
+Test EmotionBatcher: lone requests skip the batching window, concurrent and
+staggered requests share forward passes and each gets back its own rows
+"""
+
+import time
+import threading
+import numpy as np
+from facial_stress_detection import EmotionBatcher
+
+
+def counting_predict(batch_sizes, delay=0.0):
+    """Forward pass stand-in: row i predicts the mean of input i, after an optional delay"""
+    def predict(batch):
+        batch_sizes.append(len(batch))
+        time.sleep(delay)
+        return batch.reshape(len(batch), -1).mean(axis=1, keepdims=True)
+    return predict
+
+
+def test_lone_caller_does_not_wait():
+    """With one request at a time (as under sync gunicorn workers) max_wait_ms is not paid"""
+    batch_sizes = []
+    batcher = EmotionBatcher(counting_predict(batch_sizes), max_wait_ms=500)
+    begin = time.perf_counter()
+    for value in range(3):
+        with batcher.request():
+            result = batcher.predict(np.full((2, 48, 48, 1), value, np.float32))
+        assert np.allclose(result, value)
+    assert time.perf_counter() - begin < 0.5
+    assert batch_sizes == [2, 2, 2]
+
+
+def test_concurrent_callers_share_batches():
+    """Callers arriving while a forward pass runs are merged into the next one"""
+    batch_sizes = []
+    batcher = EmotionBatcher(counting_predict(batch_sizes, delay=0.1), max_wait_ms=50)
+    results = {}
+
+    def call(value):
+        results[value] = batcher.predict(np.full((1, 48, 48, 1), value, np.float32))
+
+    threads = [threading.Thread(target=call, args=(value,)) for value in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(np.allclose(results[value], value) for value in range(6))
+    assert sum(batch_sizes) == 6 and len(batch_sizes) < 6
+    assert batcher.stats()['largest_batch'] > 1
+
+
+def test_staggered_requests_share_batches():
+    """Requests arriving a few ms apart wait for each other within max_wait_ms"""
+    batch_sizes = []
+    batcher = EmotionBatcher(counting_predict(batch_sizes, delay=0.002), max_wait_ms=50)
+    results = {}
+
+    def call(value):
+        with batcher.request():
+            time.sleep(0.005)   # face detection before the emotion batch
+            results[value] = batcher.predict(np.full((1, 48, 48, 1), value, np.float32))
+
+    threads = []
+    for value in range(8):
+        threads.append(threading.Thread(target=call, args=(value,)))
+        threads[-1].start()
+        time.sleep(0.003)
+    for thread in threads:
+        thread.join()
+    assert all(np.allclose(results[value], value) for value in range(8))
+    assert sum(batch_sizes) == 8 and len(batch_sizes) <= 3, batch_sizes
+
+
+def test_request_without_faces_releases_window():
+    """A request that never reaches predict() stops holding the window when it ends"""
+    batch_sizes = []
+    batcher = EmotionBatcher(counting_predict(batch_sizes), max_wait_ms=500)
+    with batcher.request():
+        pass
+    begin = time.perf_counter()
+    with batcher.request():
+        batcher.predict(np.zeros((1, 48, 48, 1), np.float32))
+    assert time.perf_counter() - begin < 0.5
+
+
+if __name__ == '__main__':
+    for test in (test_lone_caller_does_not_wait, test_concurrent_callers_share_batches,
+                 test_staggered_requests_share_batches, test_request_without_faces_releases_window):
+        test()
+        print(f"[PASS] {test.__name__}")
@@ -0,0 +1,89 @@
+"""
+Test the bounded TTL/LRU result cache used for facial and text analysis
+"""
+
+import os
+import sys
+import time
+import subprocess
+import cv2
+import numpy as np
+from result_cache import TTLLRUCache
+
+
+def test_lru_eviction():
+    """Least recently used entry is evicted first"""
+    cache = TTLLRUCache(max_entries=2, ttl_seconds=None)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1          # 'a' is now most recent
+    cache.put('c', 3)                   # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 2 and stats['misses'] == 1
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are treated as misses"""
+    cache = TTLLRUCache(max_entries=4, ttl_seconds=0.05)
+    cache.put('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.08)
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_near_duplicate_lookup():
+    """A near key within the match function is served from another entry"""
+    cache = TTLLRUCache(max_entries=4, ttl_seconds=None)
+    cache.put('frame-1', 'result', near_key=0b1011_0000)
+
+    def within_two_bits(a, b):
+        return bin(a ^ b).count('1') <= 2
+
+    assert cache.get('frame-2', near_key=0b1011_0011, near_match=within_two_bits) == 'result'
+    assert cache.get('frame-3', near_key=0b0100_1111, near_match=within_two_bits) is None
+    stats = cache.stats()
+    assert stats['near_hits'] == 1 and stats['misses'] == 1
+
+
+def test_perceptual_cache_env():
+    """FACIAL_PERCEPTUAL_CACHE turns the near-duplicate cache on for detectors built with defaults"""
+    code = ("from facial_stress_detection import FacialStressDetector; "
+            "detector = FacialStressDetector(); print(detector.perceptual_cache, detector.perceptual_max_distance)")
+    env = dict(os.environ, FACIAL_PERCEPTUAL_CACHE='1', FACIAL_PERCEPTUAL_MAX_DISTANCE='6')
+    output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == 'True 6'
+
+
+def test_perceptual_cache_hits_reencoded_jpeg():
+    """A JPEG re-encoded at another quality is answered from the cache without a new analysis"""
+    from facial_stress_detection import FacialStressDetector
+    detector = FacialStressDetector(perceptual_cache=True)
+    analyzed = []
+    detector._analyze_image = (lambda img, motion_gate=None:
+                               analyzed.append(img.shape) or {'success': True, 'stress_score': 0.4})
+
+    image = np.zeros((240, 320, 3), np.uint8)
+    image[:, :, 1] = np.linspace(0, 255, 320, dtype=np.uint8)
+    cv2.circle(image, (160, 120), 60, (200, 180, 160), -1)
+    cv2.rectangle(image, (30, 30), (90, 200), (40, 40, 220), -1)
+    original = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+    reencoded = cv2.imencode('.jpg', cv2.imdecode(np.frombuffer(original, np.uint8), cv2.IMREAD_COLOR),
+                             [cv2.IMWRITE_JPEG_QUALITY, 70])[1].tobytes()
+    assert original != reencoded
+
+    assert detector.get_facial_stress_analysis_from_bytes(original)['stress_score'] == 0.4
+    assert detector.get_facial_stress_analysis_from_bytes(reencoded)['stress_score'] == 0.4
+    assert len(analyzed) == 1
+    assert detector.result_cache.stats()['near_hits'] == 1
+
+
+if __name__ == '__main__':
+    for test in (test_lru_eviction, test_ttl_expiry, test_near_duplicate_lookup, test_perceptual_cache_env,
+                 test_perceptual_cache_hits_reencoded_jpeg):
+        test()
+        print(f"[PASS] {test.__name__}")
+    print("\nAll result cache tests passed!")
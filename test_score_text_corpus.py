@@ -0,0 +1,109 @@
+"""
+Test score_text_corpus.py: results match the scorer, and an interrupted run resumes
+into the same output an uninterrupted run writes
+"""
+
+import os
+import json
+import tempfile
+import pandas as pd
+from score_text_corpus import checkpoint_path_for, score_corpus
+from text_stress import load_text_scorer
+
+TEXTS = ["I am so stressed about my exams", "", "a calm and lovely sunday", "work deadlines are crushing me",
+         "my boss keeps yelling and i panic", "dinner with friends was great fun", "i cannot sleep", "ok"]
+CHUNK_ROWS = 3
+
+
+def write_input(folder):
+    path = os.path.join(folder, 'posts.jsonl')
+    pd.DataFrame({'post_id': range(len(TEXTS)), 'text': TEXTS}).to_json(path, orient='records', lines=True)
+    return path
+
+
+def test_scores_match_scorer():
+    """Every row is scored like TextStressScorer scores it; empty texts are left blank"""
+    with tempfile.TemporaryDirectory() as folder:
+        output = os.path.join(folder, 'scores.csv')
+        result = score_corpus(write_input(folder), output, chunk_rows=CHUNK_ROWS, workers=1)
+        assert result['success'], result
+        assert result['rows_scored'] == len(TEXTS) and result['chunks'] == 3
+
+        scores = pd.read_csv(output)
+        assert list(scores['row']) == list(range(len(TEXTS)))
+        assert list(scores['post_id']) == list(range(len(TEXTS)))
+        assert 'text' not in scores.columns
+        expected = load_text_scorer(cache_size=0).score_texts(TEXTS)
+        for text, row, scored in zip(TEXTS, scores.itertuples(), expected):
+            if not text:
+                assert pd.isna(row.stress_prediction) and pd.isna(row.stress_probability)
+            else:
+                assert row.stress_prediction == scored['prediction']
+                assert abs(row.stress_probability - scored['stress_probability']) < 1e-9
+
+
+def test_resume_after_interruption():
+    """A run stopped after chunk 1 with a half-written chunk 2 resumes into identical output"""
+    with tempfile.TemporaryDirectory() as folder:
+        source = write_input(folder)
+        complete = os.path.join(folder, 'complete.csv')
+        assert score_corpus(source, complete, chunk_rows=CHUNK_ROWS, workers=1)['success']
+
+        output = os.path.join(folder, 'scores.csv')
+        assert score_corpus(source, output, chunk_rows=CHUNK_ROWS, workers=1)['success']
+        # Roll the checkpoint back to the end of chunk 1 and leave a torn line behind it
+        with open(output, 'rb') as f:
+            lines = f.readlines()
+        checkpoint_path = checkpoint_path_for(output)
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+        checkpoint.update(chunks_done=1, rows_done=CHUNK_ROWS, output_bytes=len(b''.join(lines[:1 + CHUNK_ROWS])))
+        with open(checkpoint_path, 'w') as f:
+            json.dump(checkpoint, f)
+        with open(output, 'wb') as f:
+            f.write(b''.join(lines[:1 + CHUNK_ROWS]) + b'4,4,1,Str')
+
+        result = score_corpus(source, output, chunk_rows=CHUNK_ROWS, workers=1)
+        assert result['success'], result
+        assert result['rows_this_run'] == len(TEXTS) - CHUNK_ROWS
+        with open(output, 'rb') as resumed, open(complete, 'rb') as expected:
+            assert resumed.read() == expected.read()
+
+        # Different settings must not append to this output
+        assert not score_corpus(source, output, chunk_rows=CHUNK_ROWS + 1, workers=1)['success']
+
+
+def test_changed_input_is_not_resumed():
+    """Rewriting the input between runs invalidates the checkpoint"""
+    with tempfile.TemporaryDirectory() as folder:
+        source = write_input(folder)
+        output = os.path.join(folder, 'scores.csv')
+        assert score_corpus(source, output, chunk_rows=CHUNK_ROWS, workers=1)['success']
+        with open(source, 'a') as f:
+            f.write(json.dumps({'post_id': len(TEXTS), 'text': 'one more stressful post'}) + '\n')
+        result = score_corpus(source, output, chunk_rows=CHUNK_ROWS, workers=1)
+        assert not result['success'] and 'input_file' in result['error']
+        assert score_corpus(source, output, chunk_rows=CHUNK_ROWS, workers=1, restart=True)['rows_scored'] == 9
+
+
+def test_utf8_and_latin1_input():
+    """Non-ASCII text survives UTF-8 input by default and Latin-1 input with encoding="""
+    frame = pd.DataFrame({'author': ['José Müller', 'Zoë'],
+                          'text': ['José is so stressed about exams', 'Zoë had a calm café morning']})
+    expected = load_text_scorer(cache_size=0).score_texts(list(frame['text']))
+    with tempfile.TemporaryDirectory() as folder:
+        for encoding in ('utf-8', 'ISO-8859-1'):
+            source = os.path.join(folder, f'posts-{encoding}.csv')
+            output = os.path.join(folder, f'scores-{encoding}.csv')
+            frame.to_csv(source, index=False, encoding=encoding)
+            assert score_corpus(source, output, workers=1, encoding=encoding)['success']
+            scores = pd.read_csv(output, encoding='utf-8')
+            assert list(scores['author']) == ['José Müller', 'Zoë']
+            assert list(scores['stress_probability']) == [scored['stress_probability'] for scored in expected]
+
+
+if __name__ == '__main__':
+    for test in (test_scores_match_scorer, test_resume_after_interruption, test_changed_input_is_not_resumed,
+                 test_utf8_and_latin1_input):
+        test()
+        print(f"[OK] {test.__name__}")
@@ -0,0 +1,113 @@
+"""
+Test TextStressScorer against the scikit-learn models it replaces on the request path
+"""
+
+import os
+import tempfile
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import KNeighborsClassifier
+from text_ann import TextANN
+from text_stress import TextStressScorer, load_text_scorer, save_artifact
+
+TRAIN_TEXTS = [
+    "i am so stressed about my exams", "work deadlines are crushing me",
+    "i cannot sleep because of anxiety", "my boss keeps yelling and i panic",
+    "bills are piling up and i am scared", "i feel anxious all the time",
+    "had a lovely walk in the park", "dinner with friends was great fun",
+    "enjoying a calm sunday morning", "the holiday was relaxing and sunny",
+    "i love my new puppy", "finished a good book today",
+]
+TRAIN_LABELS = [1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0]
+QUERIES = ["exams make me anxious", "a relaxing walk with my puppy", "", "unknown words only",
+           "i am so stressed about my exams"]
+
+
+def build(model):
+    vectorizer = TfidfVectorizer()
+    model.fit(vectorizer.fit_transform(TRAIN_TEXTS), TRAIN_LABELS)
+    return TextStressScorer(model, vectorizer)
+
+
+def assert_matches_sklearn(scorer):
+    features = scorer.vectorizer.transform(QUERIES)
+    expected_proba = scorer.model.predict_proba(features)
+    expected_labels = scorer.model.predict(features)
+    assert np.allclose(scorer.predict_proba(QUERIES), expected_proba)
+    for scored, label, proba in zip(scorer.score_texts(QUERIES), expected_labels, expected_proba):
+        assert scored['prediction'] == label
+        assert abs(scored['stress_probability'] - proba[1]) < 1e-9
+
+
+def test_cosine_knn_uniform():
+    """The mat-vec neighbor search gives predict/predict_proba's answers"""
+    scorer = build(KNeighborsClassifier(n_neighbors=3, metric='cosine'))
+    assert scorer.knn is not None
+    assert_matches_sklearn(scorer)
+
+
+def test_cosine_knn_distance_weights():
+    """Distance weighting, including an exact training-text match"""
+    scorer = build(KNeighborsClassifier(n_neighbors=5, metric='cosine', weights='distance'))
+    assert scorer.knn is not None
+    assert_matches_sklearn(scorer)
+
+
+def test_other_models_use_predict_proba():
+    """Non-KNN models are scored with their own predict_proba"""
+    scorer = build(LogisticRegression())
+    assert scorer.knn is None
+    assert_matches_sklearn(scorer)
+    assert scorer.describe()['scoring'] == 'predict_proba'
+
+
+def test_ann_probing_every_list_is_exact():
+    """With every list probed and every candidate re-ranked, the ANN finds the exact neighbors"""
+    exact = build(KNeighborsClassifier(n_neighbors=3, metric='cosine'))
+    ann = TextANN(n_components=4, n_lists=3, rerank=len(TRAIN_TEXTS)).fit(exact.model._fit_X)
+    scorer = TextStressScorer(exact.model, exact.vectorizer, ann=ann, ann_probes=ann.n_lists)
+    assert scorer.describe()['scoring'] == 'cosine-knn-ann'
+    # Texts without known words tie with every training text; any k of them are exact
+    queries = [query for query in QUERIES if exact.vectorizer.transform([query]).nnz]
+    assert np.allclose(scorer.predict_proba(queries), exact.predict_proba(queries))
+    assert ann.matches(exact.model._fit_X.shape) and not ann.matches((5, 5))
+
+
+def test_cache_hits_normalized_text():
+    """Case, whitespace and Unicode compatibility variants share one cache entry"""
+    scorer = build(KNeighborsClassifier(n_neighbors=3, metric='cosine'))
+    first = scorer.score_text("I am so stressed about my exams")
+    variants = ["i   am so STRESSED about my exams ", "\uff49 am so stressed about my exams"]
+    assert all(scorer.score_text(text) == first for text in variants)
+    stats = scorer.cache_stats()
+    assert stats['hits'] == 2 and stats['misses'] == 1
+
+
+def test_reload_when_model_file_changes():
+    """Rewriting the model files reloads them and drops cached predictions"""
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = os.path.join(folder, 'text_model.pkl')
+        vectorizer_path = os.path.join(folder, 'text_vectorizer.pkl')
+        stressed = build(KNeighborsClassifier(n_neighbors=1, metric='cosine'))
+        save_artifact(stressed.model, model_path)
+        save_artifact(stressed.vectorizer, vectorizer_path)
+        scorer = load_text_scorer(model_path, vectorizer_path, artifact_check_seconds=0)
+        assert scorer.score_text("i feel anxious all the time")['prediction'] == 1
+
+        # Same texts, every label flipped
+        flipped = KNeighborsClassifier(n_neighbors=1, metric='cosine')
+        flipped.fit(stressed.vectorizer.transform(TRAIN_TEXTS), [1 - label for label in TRAIN_LABELS])
+        save_artifact(flipped, model_path)
+        os.utime(model_path, ns=(0, os.stat(model_path).st_mtime_ns + 10 ** 9))
+        assert scorer.score_text("i feel anxious all the time")['prediction'] == 0
+        assert scorer.cache_stats()['model_reloads'] == 1
+
+
+if __name__ == '__main__':
+    for test in (test_cosine_knn_uniform, test_cosine_knn_distance_weights, test_other_models_use_predict_proba,
+                 test_ann_probing_every_list_is_exact, test_cache_hits_normalized_text,
+                 test_reload_when_model_file_changes):
+        test()
+        print(f"[PASS] {test.__name__}")
+    print("\nAll text scoring tests passed!")
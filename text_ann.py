@@ -0,0 +1,282 @@
+"""
+Approximate Nearest Neighbors for the Text Stress Model
+TF-IDF vectors are projected to a dense low-rank LSA space (TruncatedSVD) and
+searched with an inverted-file (IVF) index: spherical k-means splits the
+training texts into lists, a query scans only the n_probe lists whose centroids
+are most similar to it, and the best candidates are re-ranked with exact TF-IDF
+cosine similarity. Query cost grows with the list size, not the corpus size.
+
+Built by `python train_text_model.py --ann`, or for an existing model with
+`python text_ann.py [n_components] [n_lists] [csv_path]`; saved next to
+stresslevel_text_model.pkl as stresslevel_text_ann.pkl
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+
+DEFAULT_ANN_COMPONENTS = 256
+DEFAULT_ANN_PROBES = 8
+# LSA similarity only pre-selects: rerank * k candidates are re-ranked exactly
+# (short posts lose too much in 256 dimensions to take the LSA top-k directly)
+DEFAULT_ANN_RERANK = 40
+KMEANS_ITERATIONS = 20
+ASSIGN_CHUNK_ROWS = 65536     # bounds the (rows, n_lists) similarity block during k-means
+
+
+def ann_path_for(model_path):
+    """stresslevel_text_model.pkl -> stresslevel_text_ann.pkl"""
+    base = os.path.splitext(model_path)[0]
+    if base.endswith('_model'):
+        base = base[:-len('_model')]
+    return base + '_ann.pkl'
+
+
+def _unit_rows(dense):
+    norms = np.linalg.norm(dense, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return dense / norms
+
+
+def _rows_dot(rows, ids, query):
+    """Dot product of the CSR rows `ids` with a dense query vector"""
+    starts, ends = rows.indptr[ids], rows.indptr[ids + 1]
+    lengths = ends - starts
+    # Positions of every stored value of the selected rows, row after row
+    positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    products = rows.data[positions] * query[rows.indices[positions]]
+    return np.bincount(np.repeat(np.arange(len(ids)), lengths), weights=products, minlength=len(ids))
+
+
+def _assign(vectors, centroids):
+    """Index of the most similar centroid for every (unit-length) vector"""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        labels[start:start + ASSIGN_CHUNK_ROWS] = np.argmax(
+            vectors[start:start + ASSIGN_CHUNK_ROWS] @ centroids.T, axis=1)
+    return labels
+
+
+class IVFIndex:
+    """Inverted-file index over unit-length dense vectors (inner product = cosine)"""
+
+    def __init__(self, n_lists, seed=42):
+        self.n_lists = n_lists
+        self.seed = seed
+        self.centroids = None
+        self.ids = None       # training row ids grouped by list
+        self.offsets = None   # list i holds ids[offsets[i]:offsets[i + 1]]
+        self.vectors = None   # vectors in the same order as ids
+
+    def fit(self, vectors):
+        """Spherical k-means into n_lists lists"""
+        rng = np.random.default_rng(self.seed)
+        n_lists = max(1, min(self.n_lists, len(vectors)))
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = _assign(vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, vectors)
+            counts = np.bincount(labels, minlength=n_lists)
+            # Empty lists restart from a random training vector
+            empty = counts == 0
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+            centroids = normalize(sums).astype(np.float32)
+
+        labels = _assign(vectors, centroids)
+        self.ids = np.argsort(labels, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=n_lists))])
+        self.vectors = vectors[self.ids]
+        self.centroids = centroids
+        self.n_lists = n_lists
+        return self
+
+    def candidates(self, query, n_probe, min_candidates):
+        """
+        Training row ids from the n_probe lists closest to one query vector;
+        further lists are scanned until there are at least min_candidates ids
+        Returns: (ids, similarity of each id to the query)
+        """
+        order = np.argsort(-(self.centroids @ query))
+        ids, sims, found = [], [], 0
+        for probed, lst in enumerate(order):
+            if probed >= n_probe and found >= min_candidates:
+                break
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if start == end:
+                continue
+            ids.append(self.ids[start:end])
+            sims.append(self.vectors[start:end] @ query)
+            found += end - start
+        return np.concatenate(ids), np.concatenate(sims)
+
+
+class TextANN:
+    """LSA projection plus IVF index over the training matrix of the cosine KNN"""
+
+    def __init__(self, n_components=DEFAULT_ANN_COMPONENTS, n_lists=None, n_probe=DEFAULT_ANN_PROBES,
+                 rerank=DEFAULT_ANN_RERANK, seed=42):
+        self.n_components = n_components
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.rerank = rerank
+        self.seed = seed
+        self.projection = None   # (n_features, n_components) LSA basis
+        self.index = None
+        self.n_train = 0
+        self.n_features = 0
+
+    def project(self, features):
+        """Unit-length float32 LSA vectors of TF-IDF rows"""
+        # Same as TruncatedSVD.transform without its per-call input validation
+        # (float32 features, so scipy does not upcast a copy of the basis every call)
+        return _unit_rows(np.asarray(features.astype(np.float32) @ self.projection))
+
+    def fit(self, train_features):
+        """Fit the projection and the index on the (n_train, n_features) TF-IDF matrix"""
+        self.n_train, self.n_features = train_features.shape
+        components = max(1, min(self.n_components, self.n_features - 1, self.n_train - 1))
+        svd = TruncatedSVD(n_components=components, random_state=self.seed).fit(train_features)
+        self.projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+        self.n_components = components
+        # sqrt(n) lists of about sqrt(n) texts each
+        n_lists = self.n_lists or max(1, int(np.sqrt(self.n_train)))
+        self.index = IVFIndex(n_lists, seed=self.seed).fit(self.project(train_features))
+        self.n_lists = self.index.n_lists
+        return self
+
+    def search(self, features, k, train_rows=None, n_probe=None):
+        """
+        k approximate nearest training rows for each TF-IDF row of features
+        train_rows: L2-normalized training matrix; when given, candidates are
+                    re-ranked by exact cosine similarity
+        Returns: (neighbors, cosine distances), both (n, k)
+        """
+        n_probe = n_probe or self.n_probe
+        queries = self.project(features)
+        n_candidates = k * self.rerank if train_rows is not None else k
+        if train_rows is not None:
+            features = features.tocsr()
+            dense_query = np.zeros(self.n_features)
+        neighbors = np.empty((len(queries), k), dtype=np.int64)
+        distances = np.empty((len(queries), k))
+        for i, query in enumerate(queries):
+            ids, sims = self.index.candidates(query, n_probe, k)
+            if train_rows is not None:
+                if len(ids) > n_candidates:
+                    keep = np.argpartition(-sims, n_candidates - 1)[:n_candidates]
+                    ids = ids[keep]
+                start, end = features.indptr[i], features.indptr[i + 1]
+                columns, values = features.indices[start:end], features.data[start:end]
+                norm = np.sqrt(np.dot(values, values)) or 1.0
+                dense_query[columns] = values / norm
+                sims = _rows_dot(train_rows, ids, dense_query)
+                dense_query[columns] = 0.0
+            top = np.argpartition(-sims, k - 1)[:k] if len(ids) > k else np.arange(len(ids))
+            neighbors[i] = ids[top]
+            distances[i] = np.clip(1.0 - sims[top], 0.0, 2.0)
+        return neighbors, distances
+
+    def matches(self, train_shape):
+        """True when the index was built for a training matrix of this shape"""
+        return (self.n_train, self.n_features) == tuple(train_shape)
+
+    def describe(self):
+        return {'components': self.n_components, 'lists': self.n_lists,
+                'probes': self.n_probe, 'rerank': self.rerank}
+
+
+def _majority(labels, neighbors):
+    return np.array([np.bincount(row).argmax() for row in labels[neighbors]])
+
+
+def evaluate_ann(ann, train_features, query_features, k, labels, probes=(1, 2, 4, 8, 16)):
+    """
+    recall@k of the ANN against exact cosine KNN, agreement of the majority-vote
+    labels (labels: encoded training labels), and per-query latency of both
+    Returns: list of dicts, the first for exact search, then one per probe count
+    """
+    train_rows = normalize(train_features.tocsr())
+    train_t = train_rows.T.tocsr()
+    queries = normalize(query_features.tocsr())
+
+    def exact(row):
+        distances = 1.0 - (row @ train_t).toarray()
+        return np.argpartition(distances, k - 1, axis=1)[:, :k]
+
+    exact_neighbors, timings = [], []
+    for i in range(queries.shape[0]):
+        start = time.perf_counter()
+        exact_neighbors.append(exact(queries[i])[0])
+        timings.append((time.perf_counter() - start) * 1000)
+    exact_labels = _majority(labels, np.array(exact_neighbors))
+    rows = [{'mode': 'exact', 'recall': 1.0, 'agreement': 1.0, 'mean_ms': float(np.mean(timings)),
+             'p95_ms': float(np.percentile(timings, 95))}]
+
+    for n_probe in probes:
+        if n_probe > ann.n_lists:
+            break
+        hits, timings, found = 0, [], []
+        for i in range(queries.shape[0]):
+            start = time.perf_counter()
+            neighbors, _ = ann.search(queries[i], k, train_rows, n_probe=n_probe)
+            timings.append((time.perf_counter() - start) * 1000)
+            hits += len(np.intersect1d(exact_neighbors[i], neighbors[0]))
+            found.append(neighbors[0])
+        agreement = float(np.mean(_majority(labels, np.array(found)) == exact_labels))
+        rows.append({'mode': f'ann probes={n_probe}', 'recall': hits / float(k * queries.shape[0]),
+                     'agreement': agreement, 'mean_ms': float(np.mean(timings)),
+                     'p95_ms': float(np.percentile(timings, 95))})
+    return rows
+
+
+def print_ann_report(rows, k):
+    print("\n" + "=" * 70)
+    print(f"{'Search':<18} {f'Recall@{k}':>10} {'Label agree':>12} {'Mean (ms)':>12} {'p95 (ms)':>12}")
+    print("-" * 70)
+    for row in rows:
+        print(f"{row['mode']:<18} {row['recall']:>10.3f} {row['agreement']:>12.3f} "
+              f"{row['mean_ms']:>12.3f} {row['p95_ms']:>12.3f}")
+    print("=" * 70)
+
+
+def build_ann_for_model(model, train_features, query_features, ann_path, n_components=DEFAULT_ANN_COMPONENTS,
+                        n_lists=None):
+    """Build, evaluate and save the ANN index for a fitted cosine KNN model"""
+    start = time.perf_counter()
+    ann = TextANN(n_components=n_components, n_lists=n_lists).fit(train_features)
+    print(f"[OK] ANN index built in {time.perf_counter() - start:.1f}s: {ann.describe()}")
+    rows = evaluate_ann(ann, train_features, query_features, model.n_neighbors, np.asarray(model._y))
+    print_ann_report(rows, model.n_neighbors)
+
+    from text_stress import save_artifact
+    save_artifact(ann, ann_path)
+    print(f"[OK] ANN index saved as '{ann_path}'")
+    return ann
+
+
+def main():
+    """Build the index for the saved model, evaluated on the held-out split of train_text_model.py"""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from text_stress import TEXT_MODEL_PATH, TEXT_VECTORIZER_PATH, load_artifact
+    # Through the module, so the pickled index refers to text_ann.TextANN, not __main__
+    from text_ann import build_ann_for_model
+    n_components = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ANN_COMPONENTS
+    n_lists = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    csv_path = sys.argv[3] if len(sys.argv) > 3 else 'dreaddit-train.csv'
+
+    model = load_artifact(TEXT_MODEL_PATH)
+    vectorizer = load_artifact(TEXT_VECTORIZER_PATH)
+    df = pd.read_csv(csv_path, encoding='ISO-8859-1')
+    _, X_test, _, _ = train_test_split(df['text'].fillna(''), df['label'], test_size=0.2,
+                                       random_state=42, stratify=df['label'])
+    build_ann_for_model(model, model._fit_X.tocsr(), vectorizer.transform(X_test),
+                        ann_path_for(TEXT_MODEL_PATH), n_components, n_lists)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+"""
+Text-based Stress Scoring
+Loads the text stress model and its TF-IDF vectorizer (train_text_model.py) once
+and scores texts with a single neighbor search per request.
+
+KNeighborsClassifier.predict and predict_proba each run their own brute-force
+scan over the training matrix. For the cosine KNN the training matrix is
+L2-normalized once here, so cosine similarity to every training text is one
+sparse mat-vec; the top-k neighbors are picked with argpartition and both the
+label and the probabilities come from that single result. Other model types
+are scored with one predict_proba call.
+
+With an ANN index next to the model (text_ann.py, `train_text_model.py --ann`)
+the neighbors come from the approximate LSA/IVF search instead of scanning
+every training text. TEXT_ANN=0 disables it, TEXT_ANN_PROBES overrides the
+number of index lists scanned per query.
+
+Predictions are cached by normalized text (Unicode NFKC, case-folded, runs of
+whitespace collapsed), so repeated short phrases skip the model entirely. The
+model files are watched: when one changes on disk the scorer reloads them and
+drops every cached prediction.
+"""
+
+import os
+import copy
+import time
+import pickle
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from sklearn.preprocessing import normalize
+from result_cache import TTLLRUCache
+from text_ann import ann_path_for
+
+# Try to import joblib for better sklearn model loading
+try:
+    import joblib
+    USE_JOBLIB = True
+except ImportError:
+    USE_JOBLIB = False
+
+TEXT_MODEL_PATH = os.getenv('TEXT_MODEL_PATH', 'stresslevel_text_model.pkl')
+TEXT_VECTORIZER_PATH = os.getenv('TEXT_VECTORIZER_PATH', 'stresslevel_text_vectorizer.pkl')
+TEXT_ANN_ENABLED = os.getenv('TEXT_ANN', '1') == '1'
+TEXT_ANN_PROBES = int(os.getenv('TEXT_ANN_PROBES', '0')) or None   # None keeps the index default
+
+# Prediction cache (TEXT_CACHE_SIZE=0 disables it) and model file change checks
+DEFAULT_TEXT_CACHE_SIZE = int(os.getenv('TEXT_CACHE_SIZE', '4096'))
+DEFAULT_TEXT_CACHE_TTL = float(os.getenv('TEXT_CACHE_TTL', '3600')) or None
+DEFAULT_ARTIFACT_CHECK_SECONDS = float(os.getenv('TEXT_ARTIFACT_CHECK_SECONDS', '5'))
+
+# Exact search over a batch is chunked so the dense (rows, n_train) similarity
+# block stays below this many values (32 MB of float64)
+SEARCH_BLOCK_VALUES = 4 * 1024 * 1024
+
+# Labels of train_text_model.py
+TEXT_LABEL_NAMES = {0: 'No Stress', 1: 'Stress'}
+
+
+def load_artifact(path):
+    """Unpickle a model file with joblib, falling back to pickle"""
+    if USE_JOBLIB:
+        try:
+            return joblib.load(path)
+        except Exception:
+            pass
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_artifact(obj, path):
+    """Pickle a model file with joblib when available, like train_text_model.py"""
+    if USE_JOBLIB:
+        joblib.dump(obj, path)
+    else:
+        with open(path, 'wb') as f:
+            pickle.dump(obj, f)
+
+
+def normalize_text(text):
+    """Canonical form of a text: NFKC, case-folded, whitespace collapsed"""
+    return ' '.join(unicodedata.normalize('NFKC', text).casefold().split())
+
+
+def stress_label_name(prediction):
+    """Readable name of a text model label"""
+    try:
+        return TEXT_LABEL_NAMES.get(int(prediction), str(prediction))
+    except (TypeError, ValueError):
+        return str(prediction)
+
+
+def artifact_signature(paths):
+    """(path, mtime, size) of every model file; None for files that do not exist"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def _build_knn_index(model, exact=True):
+    """Normalized training matrix of a cosine KNN model, or None for other models"""
+    if getattr(model, 'effective_metric_', None) != 'cosine' or getattr(model, 'outputs_2d_', True):
+        return None
+    train = getattr(model, '_fit_X', None)
+    if train is None or not hasattr(train, 'tocsr'):
+        return None
+    if model.weights not in ('uniform', 'distance'):
+        return None
+    train = normalize(train.tocsr().astype(np.float64))
+    return {
+        # Rows re-rank ANN candidates; the exact search keeps them transposed so
+        # one query batch is (n, features) @ (features, n_train)
+        'train': train,
+        'train_t': train.T.tocsr() if exact else None,
+        'labels': np.asarray(model._y),
+        'k': min(model.n_neighbors, train.shape[0]),
+        'weights': model.weights
+    }
+
+
+class TextStressScorer:
+    """Text stress model plus vectorizer behind one scoring call"""
+
+    def __init__(self, model, vectorizer, ann=None, ann_probes=None, cache_size=DEFAULT_TEXT_CACHE_SIZE,
+                 cache_ttl=DEFAULT_TEXT_CACHE_TTL, artifact_paths=None,
+                 artifact_check_seconds=DEFAULT_ARTIFACT_CHECK_SECONDS):
+        """
+        ann: optional text_ann.TextANN built for this model's training matrix
+        cache_size, cache_ttl: bounds of the prediction cache (cache_size=0 disables it)
+        artifact_paths: (model, vectorizer, ANN index) files; when any of them
+                        changes the scorer reloads them and clears the cache.
+                        Checked at most every artifact_check_seconds
+        """
+        self.ann_probes = ann_probes
+        self.cache = TTLLRUCache(cache_size, cache_ttl) if cache_size else None
+        self.artifact_paths = artifact_paths
+        self.artifact_check_seconds = artifact_check_seconds
+        self._signature = artifact_signature(artifact_paths) if artifact_paths else None
+        self._next_check = time.monotonic() + artifact_check_seconds
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.state = None
+        self._use_model(model, vectorizer, ann)
+
+    def _use_model(self, model, vectorizer, ann):
+        """Swap in a model; requests read self.state once, so they never mix two models"""
+        knn = _build_knn_index(model, exact=ann is None)
+        generation = self.state['generation'] + 1 if self.state else 0
+        self.state = {
+            'model': model,
+            'vectorizer': vectorizer,
+            'classes': np.asarray(model.classes_),
+            'knn': knn,
+            'ann': ann if knn is not None else None,
+            'generation': generation
+        }
+        if self.cache is not None:
+            self.cache.clear()
+
+    @property
+    def model(self):
+        return self.state['model']
+
+    @property
+    def vectorizer(self):
+        return self.state['vectorizer']
+
+    @property
+    def knn(self):
+        return self.state['knn']
+
+    @property
+    def ann(self):
+        return self.state['ann']
+
+    def reload_if_changed(self):
+        """Reload the model files if they changed on disk; returns True after a reload"""
+        if not self.artifact_paths:
+            return False
+        now = time.monotonic()
+        if now < self._next_check or not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = now + self.artifact_check_seconds
+            signature = artifact_signature(self.artifact_paths)
+            if signature == self._signature:
+                return False
+            # A file still being written changes again when done, so a failed
+            # load is retried on the next change, not on every check
+            self._signature = signature
+            model_path, vectorizer_path, ann_path = self.artifact_paths
+            try:
+                model = load_artifact(model_path)
+                vectorizer = load_artifact(vectorizer_path)
+            except Exception as e:
+                print(f"[WARNING] Text model files changed but could not be loaded, keeping the current model: {e}")
+                return False
+            self._use_model(model, vectorizer, load_ann(model, ann_path))
+            self.reloads += 1
+            print(f"[OK] Text-based stress model reloaded ({self.describe()['scoring']}), prediction cache cleared")
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _neighbors(self, state, features):
+        """(neighbors, cosine distances), both (n, k): exact mat-vec search or the ANN index"""
+        index = state['knn']
+        k = index['k']
+        if state['ann'] is not None:
+            return state['ann'].search(features, k, index['train'], n_probe=self.ann_probes)
+        features = normalize(features)
+        neighbors = np.empty((features.shape[0], k), dtype=np.int64)
+        neighbor_distances = np.empty((features.shape[0], k))
+        block = max(1, SEARCH_BLOCK_VALUES // index['train_t'].shape[1])
+        for start in range(0, features.shape[0], block):
+            similarity = (features[start:start + block] @ index['train_t']).toarray()
+            distances = np.clip(1.0 - similarity, 0.0, 2.0)
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            neighbors[start:start + block] = nearest
+            neighbor_distances[start:start + block] = np.take_along_axis(distances, nearest, axis=1)
+        return neighbors, neighbor_distances
+
+    def _knn_proba(self, state, features):
+        """Class probabilities from one cosine neighbor search (exact search: same result as predict_proba)"""
+        index = state['knn']
+        neighbors, neighbor_distances = self._neighbors(state, features)
+        neighbor_labels = index['labels'][neighbors]
+
+        if index['weights'] == 'uniform':
+            weights = np.ones(neighbors.shape)
+        else:
+            # Exact matches take all the weight, as in scikit-learn
+            with np.errstate(divide='ignore'):
+                weights = 1.0 / neighbor_distances
+            exact = np.isinf(weights)
+            rows = exact.any(axis=1)
+            weights[rows] = exact[rows].astype(np.float64)
+
+        proba = np.zeros((len(neighbors), len(state['classes'])))
+        for i in range(len(state['classes'])):
+            proba[:, i] = (weights * (neighbor_labels == i)).sum(axis=1)
+        totals = proba.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        return proba / totals
+
+    def _predict_proba(self, state, texts):
+        features = state['vectorizer'].transform(texts)
+        if state['knn'] is not None:
+            return self._knn_proba(state, features)
+        return state['model'].predict_proba(features)
+
+    def predict_proba(self, texts):
+        """(n, n_classes) probabilities for a list of texts, one transform for all of them"""
+        return self._predict_proba(self.state, texts)
+
+    def _score(self, state, texts):
+        """Model scores for texts (no cache)"""
+        if state['knn'] is None and not hasattr(state['model'], 'predict_proba'):
+            predictions = state['model'].predict(state['vectorizer'].transform(texts))
+            return [{'prediction': np.asarray(prediction).item(), 'stress_probability': 0.5}
+                    for prediction in predictions]
+
+        proba = self._predict_proba(state, texts)
+        predictions = state['classes'][np.argmax(proba, axis=1)]
+        has_stress_column = proba.shape[1] > 1
+        class_names = [str(label) for label in state['classes']]
+        return [{
+            'prediction': prediction.item(),
+            'stress_probability': float(row[1]) if has_stress_column else 0.5,
+            'probabilities': dict(zip(class_names, row.tolist()))
+        } for prediction, row in zip(predictions, proba)]
+
+    def score_texts(self, texts):
+        """
+        Score a list of texts (normalized first, see normalize_text); cached
+        texts are answered from the cache, the rest in one batch
+        Returns: list of dicts with 'prediction' (model label), 'stress_probability'
+                 and 'probabilities' (per class label, when the model has them)
+        """
+        self.reload_if_changed()
+        state = self.state
+        texts = [normalize_text(text) for text in texts]
+        if self.cache is None:
+            return self._score(state, texts)
+
+        # Keys carry the model generation, so a result computed while the model
+        # was being swapped is never served for the new one
+        keys = [(state['generation'], hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest())
+                for text in texts]
+        results = [self.cache.get(key) for key in keys]
+        pending = {}
+        for i, result in enumerate(results):
+            if result is None:
+                pending.setdefault(keys[i], []).append(i)
+        if pending:
+            first = [positions[0] for positions in pending.values()]
+            for key, scored in zip(pending, self._score(state, [texts[i] for i in first])):
+                self.cache.put(key, scored)
+                for i in pending[key]:
+                    results[i] = scored
+        return [copy.deepcopy(result) for result in results]
+
+    def score_text(self, text):
+        """Score one text; see score_texts"""
+        return self.score_texts([text])[0]
+
+    def cache_stats(self):
+        """Prediction cache counters plus model reloads"""
+        stats = self.cache.stats() if self.cache is not None else {'enabled': False}
+        stats['model_reloads'] = self.reloads
+        return stats
+
+    def describe(self):
+        """Model type and scoring path, for logs and health checks"""
+        state = self.state
+        if state['ann'] is not None:
+            scoring = 'cosine-knn-ann'
+        else:
+            scoring = 'cosine-knn-matvec' if state['knn'] is not None else 'predict_proba'
+        return {
+            'model': type(state['model']).__name__,
+            'scoring': scoring,
+            'training_size': int(state['knn']['train'].shape[0]) if state['knn'] is not None else None,
+            'ann': (dict(state['ann'].describe(), probes=self.ann_probes or state['ann'].n_probe)
+                    if state['ann'] is not None else None)
+        }
+
+
+def load_ann(model, ann_path):
+    """The ANN index saved next to the model, or None when absent, disabled or stale"""
+    if not TEXT_ANN_ENABLED or not os.path.exists(ann_path):
+        return None
+    try:
+        ann = load_artifact(ann_path)
+    except Exception as e:
+        print(f"[WARNING] Error loading text ANN index: {e}")
+        return None
+    train = getattr(model, '_fit_X', None)
+    if train is None or not ann.matches(train.shape):
+        print(f"[WARNING] Text ANN index {ann_path} was built for another model, using exact search. "
+              f"Rebuild it with 'python text_ann.py'.")
+        return None
+    return ann
+
+
+def load_text_scorer(model_path=TEXT_MODEL_PATH, vectorizer_path=TEXT_VECTORIZER_PATH, **scorer_settings):
+    """
+    Load the text model files (and ANN index, if any) into a TextStressScorer
+    that watches them for changes; None when unavailable
+    scorer_settings are passed to TextStressScorer (cache_size, cache_ttl, artifact_check_seconds)
+    """
+    if not (os.path.exists(model_path) and os.path.exists(vectorizer_path)):
+        print("[INFO] Text-based stress model files not found. Run 'python train_text_model.py' to create them.")
+        return None
+    try:
+        ann_path = ann_path_for(model_path)
+        model = load_artifact(model_path)
+        scorer = TextStressScorer(model, load_artifact(vectorizer_path), ann=load_ann(model, ann_path),
+                                  ann_probes=TEXT_ANN_PROBES, artifact_paths=(model_path, vectorizer_path, ann_path),
+                                  **scorer_settings)
+        print(f"[OK] Text-based stress model loaded successfully ({scorer.describe()['scoring']})")
+        return scorer
+    except Exception as e:
+        print(f"[WARNING] Error loading text-based stress model: {e}")
+        return None
@@ -1,7 +1,13 @@
 """
 Training script for text-based stress detection model
 Uses the dreaddit-train.csv dataset with text posts
+
+Usage: python train_text_model.py [--ann]
+  --ann  also build the approximate nearest-neighbor index (text_ann.py) and
+         report its recall@k and latency against exact KNN
 """
+import os
+import sys
 import pandas as pd
 import numpy as np
 import pickle
@@ -81,5 +87,15 @@ else:
     print("✅ Model saved as 'stresslevel_text_model.pkl' (using pickle)")
     print("✅ Vectorizer saved as 'stresslevel_text_vectorizer.pkl' (using pickle)")
 
+# The ANN index describes the training matrix of the model just replaced
+from text_ann import ann_path_for, build_ann_for_model
+ann_path = ann_path_for('stresslevel_text_model.pkl')
+if '--ann' in sys.argv:
+    print("\nBuilding approximate nearest-neighbor index...")
+    build_ann_for_model(knn, X_train_vect, X_test_vect, ann_path)
+elif os.path.exists(ann_path):
+    os.remove(ann_path)
+    print(f"ℹ️ Removed outdated ANN index '{ann_path}' (rebuild with --ann)")
+
 print("\n✅ Training complete! You can now use these files in your Flask app!")
 print("ℹ️ Note: If you experience loading errors, try: pip install joblib")
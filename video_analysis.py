@@ -0,0 +1,263 @@
+"""
+Offline Video Stress Analysis
+Decodes a recorded session (MP4, AVI, MOV, ...) on a producer thread while the
+caller's thread runs face detection and batched emotion inference on sampled
+frames. Memory stays bounded for hour-long files: at most queue_size decoded
+frames are in flight and the timeline keeps one small entry per second.
+
+Usage: python video_analysis.py <video_path> [samples_per_second] [output.json]
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import threading
+import cv2
+import numpy as np
+from facial_stress_detection import (FacialStressDetector, score_emotion_matrix, emotions_to_vector,
+                                     stress_level_name, EMOTION_ORDER, STRESS_LEVELS, STRESS_LEVEL_THRESHOLDS)
+
+DEFAULT_SAMPLES_PER_SECOND = 2.0
+DEFAULT_BATCH_FRAMES = 8     # sampled frames whose faces share one emotion inference
+DEFAULT_QUEUE_SIZE = 16      # decoded frames buffered between producer and consumer
+FALLBACK_FPS = 30.0          # when the container does not report a frame rate
+
+
+def _decode_frames(cap, step, fps, frames, stop, errors):
+    """Producer: decode every step-th frame and queue (timestamp, frame); None marks the end"""
+    try:
+        index = 0
+        while not stop.is_set():
+            if index % step == 0:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                item = (index / fps, frame)
+                while not stop.is_set():
+                    try:
+                        frames.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+            elif not cap.grab():
+                # grab() advances without converting the skipped frame to BGR
+                break
+            index += 1
+    except Exception as e:
+        errors.append(e)
+    finally:
+        cap.release()
+        while True:
+            try:
+                frames.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                if stop.is_set():
+                    break
+
+
+class _SecondStats:
+    """Running per-second aggregates"""
+    __slots__ = ('frames', 'faces', 'stress_sum', 'emotion_sum')
+
+    def __init__(self):
+        self.frames = 0
+        self.faces = 0
+        self.stress_sum = 0.0
+        self.emotion_sum = np.zeros(len(EMOTION_ORDER))
+
+
+def analyze_video(detector, video_path, samples_per_second=DEFAULT_SAMPLES_PER_SECOND, every_n_frames=None,
+                  batch_frames=DEFAULT_BATCH_FRAMES, queue_size=DEFAULT_QUEUE_SIZE, max_seconds=None):
+    """
+    Per-second stress timeline and summary of a video file
+    detector: FacialStressDetector used for detection and emotion inference
+    samples_per_second: frames analyzed per second of video (ignored when
+                        every_n_frames is given)
+    every_n_frames: analyze every Nth decoded frame
+    max_seconds: refuse videos longer than this (checked from the container
+                 header, and while decoding when the header has no frame count)
+    Returns: {'success', 'summary', 'timeline'} or {'success': False, 'error'};
+             too long videos also carry 'too_long': True
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return {'success': False, 'error': f"Could not open video: {os.path.basename(video_path)}"}
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or FALLBACK_FPS
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    if max_seconds and total_frames > 0 and total_frames / fps > max_seconds:
+        cap.release()
+        return _too_long(max_seconds)
+    if every_n_frames:
+        step = max(1, int(every_n_frames))
+    else:
+        step = max(1, int(round(fps / max(samples_per_second, 1e-6))))
+
+    start = time.perf_counter()
+    frames = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    producer = threading.Thread(target=_decode_frames, args=(cap, step, fps, frames, stop, errors),
+                                name='video-decode', daemon=True)
+    producer.start()
+
+    seconds = {}
+    frames_sampled = 0
+    try:
+        finished = False
+        while not finished:
+            # Gather a group of sampled frames, then run one emotion inference for all their faces
+            crops, face_seconds = [], []
+            group = 0
+            while group < batch_frames:
+                item = frames.get()
+                if item is None:
+                    finished = True
+                    break
+                timestamp, frame = item
+                if max_seconds and timestamp > max_seconds:
+                    return _too_long(max_seconds)
+                group += 1
+                frames_sampled += 1
+                second = int(timestamp)
+                stats = seconds.get(second)
+                if stats is None:
+                    stats = seconds[second] = _SecondStats()
+                stats.frames += 1
+
+                faces, gray = detector.detect_faces(frame)
+                crops.extend(detector.crop_faces(gray, faces))
+                face_seconds.extend([second] * len(faces))
+                del frame, gray
+
+            if not crops:
+                continue
+            emotions_list = detector.analyze_face_crops(crops)
+            analyzed = [i for i, emotions in enumerate(emotions_list) if emotions is not None]
+            if not analyzed:
+                continue
+            vectors = np.array([emotions_to_vector(emotions_list[i]) for i in analyzed])
+            vectors /= np.maximum(vectors.sum(axis=1, keepdims=True), 1e-12)
+            scores, _, _ = score_emotion_matrix(vectors)
+            for i, vector, score in zip(analyzed, vectors, scores):
+                stats = seconds[face_seconds[i]]
+                stats.faces += 1
+                stats.stress_sum += score
+                stats.emotion_sum += vector
+    except Exception as e:
+        print(f"[ERROR] Video analysis error: {e}")
+        return {'success': False, 'error': str(e)}
+    finally:
+        stop.set()
+        producer.join(timeout=5)
+
+    if errors:
+        print(f"[ERROR] Video decoding error: {errors[0]}")
+        return {'success': False, 'error': str(errors[0])}
+    if frames_sampled == 0:
+        return {'success': False, 'error': 'No frames could be decoded'}
+
+    return {
+        'success': True,
+        'summary': _summarize(seconds, fps, total_frames, step, frames_sampled, time.perf_counter() - start),
+        'timeline': _timeline(seconds)
+    }
+
+
+def _too_long(max_seconds):
+    return {
+        'success': False,
+        'too_long': True,
+        'error': f"Video is longer than {max_seconds:g} seconds. "
+                 f"Analyze long recordings offline with 'python video_analysis.py <video_path>'."
+    }
+
+
+def _timeline(seconds):
+    """One entry per second of video that had sampled frames"""
+    timeline = []
+    for second in sorted(seconds):
+        stats = seconds[second]
+        entry = {'second': second, 'frames': stats.frames, 'faces': stats.faces}
+        if stats.faces:
+            average = stats.stress_sum / stats.faces
+            entry['average_stress_score'] = round(average, 3)
+            entry['stress_level'] = stress_level_name(average)
+            entry['dominant_emotion'] = EMOTION_ORDER[int(stats.emotion_sum.argmax())]
+        else:
+            entry['average_stress_score'] = None
+            entry['stress_level'] = 'Unknown'
+            entry['dominant_emotion'] = None
+        timeline.append(entry)
+    return timeline
+
+
+def _summarize(seconds, fps, total_frames, step, frames_sampled, elapsed):
+    faces = sum(stats.faces for stats in seconds.values())
+    summary = {
+        'fps': round(fps, 2),
+        'duration_seconds': round(total_frames / fps, 1) if total_frames else len(seconds),
+        'frame_step': step,
+        'frames_sampled': frames_sampled,
+        'faces_analyzed': faces,
+        'seconds_with_faces': sum(1 for stats in seconds.values() if stats.faces),
+        'processing_seconds': round(elapsed, 2)
+    }
+    if not faces:
+        summary.update({'average_stress_score': None, 'overall_stress_level': 'Unknown'})
+        return summary
+
+    with_faces = [(second, stats) for second, stats in sorted(seconds.items()) if stats.faces]
+    per_second = np.array([stats.stress_sum / stats.faces for _, stats in with_faces])
+    levels = np.searchsorted(STRESS_LEVEL_THRESHOLDS, per_second, side='right')
+    average = sum(stats.stress_sum for _, stats in with_faces) / faces
+    peak = int(per_second.argmax())
+    summary.update({
+        'average_stress_score': round(average, 3),
+        'overall_stress_level': stress_level_name(average),
+        'peak_stress_second': with_faces[peak][0],
+        'peak_stress_score': round(float(per_second[peak]), 3),
+        'dominant_emotion': EMOTION_ORDER[int(sum(stats.emotion_sum for _, stats in with_faces).argmax())],
+        'seconds_per_level': dict(zip(STRESS_LEVELS, np.bincount(levels, minlength=len(STRESS_LEVELS)).tolist()))
+    })
+    if summary['duration_seconds']:
+        summary['realtime_factor'] = round(summary['duration_seconds'] / max(elapsed, 1e-6), 1)
+    return summary
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    video_path = sys.argv[1]
+    samples_per_second = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SAMPLES_PER_SECOND
+    output_path = sys.argv[3] if len(sys.argv) > 3 else None
+
+    detector = FacialStressDetector(warm_up=True, cache_size=0, motion_threshold=None)
+    result = analyze_video(detector, video_path, samples_per_second=samples_per_second)
+    if not result['success']:
+        print(f"[ERROR] {result['error']}")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print(f"{'Second':>7} {'Frames':>7} {'Faces':>6} {'Stress':>7}  Level / emotion")
+    print("-" * 60)
+    for entry in result['timeline']:
+        score = entry['average_stress_score']
+        print(f"{entry['second']:>7} {entry['frames']:>7} {entry['faces']:>6} "
+              f"{'-' if score is None else f'{score:.2f}':>7}  {entry['stress_level']} / {entry['dominant_emotion']}")
+    print("=" * 60)
+    for key, value in result['summary'].items():
+        print(f"{key}: {value}")
+
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"[OK] Saved analysis to {output_path}")
+
+
+if __name__ == '__main__':
+    main()
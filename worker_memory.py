@@ -0,0 +1,88 @@
+"""
+Per-worker memory of a running gunicorn server (Linux)
+Reads /proc/<pid>/smaps_rollup of the master and its workers and reports RSS,
+PSS and USS (unique set size: private pages, what each extra worker really
+costs). With GUNICORN_PRELOAD=1 the preloaded models show up as shared pages
+instead of per-worker USS.
+
+Usage: python worker_memory.py [master_pid]
+"""
+
+import os
+import sys
+
+SMAPS_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+
+
+def read_memory(pid):
+    """smaps_rollup fields of pid in MB, plus 'Uss'"""
+    memory = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0].rstrip(':') in SMAPS_FIELDS:
+                memory[parts[0].rstrip(':')] = int(parts[1]) / 1024.0
+    memory['Uss'] = memory.get('Private_Clean', 0.0) + memory.get('Private_Dirty', 0.0)
+    memory['Shared'] = memory.get('Shared_Clean', 0.0) + memory.get('Shared_Dirty', 0.0)
+    return memory
+
+
+def parent_pid(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        # The command name may contain spaces, so split after its closing parenthesis
+        return int(f.read().rsplit(')', 1)[1].split()[1])
+
+
+def is_gunicorn(pid):
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            args = f.read().split(b'\0')
+    except OSError:
+        return False
+    # gunicorn itself or python running it; not e.g. a shell whose arguments mention it
+    return any(os.path.basename(arg).startswith(b'gunicorn') for arg in args[:2])
+
+
+def find_master():
+    """Oldest gunicorn process whose parent is not gunicorn"""
+    for pid in sorted(int(entry) for entry in os.listdir('/proc') if entry.isdigit()):
+        try:
+            if is_gunicorn(pid) and not is_gunicorn(parent_pid(pid)):
+                return pid
+        except OSError:
+            continue
+    return None
+
+
+def main():
+    master = int(sys.argv[1]) if len(sys.argv) > 1 else find_master()
+    if master is None:
+        print("[ERROR] No running gunicorn master found")
+        sys.exit(1)
+
+    workers = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                if parent_pid(int(entry)) == master:
+                    workers.append(int(entry))
+            except OSError:
+                continue
+
+    print("\n" + "=" * 64)
+    print(f"{'Process':>14} {'RSS (MB)':>10} {'PSS (MB)':>10} {'USS (MB)':>10} {'Shared (MB)':>12}")
+    print("-" * 64)
+    rows = [('master', master)] + [(f'worker {pid}', pid) for pid in sorted(workers)]
+    uss = []
+    for label, pid in rows:
+        memory = read_memory(pid)
+        if pid != master:
+            uss.append(memory['Uss'])
+        print(f"{label:>14} {memory['Rss']:>10.1f} {memory['Pss']:>10.1f} {memory['Uss']:>10.1f} {memory['Shared']:>12.1f}")
+    print("=" * 64)
+    if uss:
+        print(f"[INFO] {len(uss)} worker(s), mean USS {sum(uss) / len(uss):.1f} MB per worker")
+
+
+if __name__ == '__main__':
+    main()